@@ -1,4 +1,6 @@
 from strategy import Strategy
+from percentDownIndex import PercentDownIndex
+from strategySpec import LimitedFundsSpec, ConstTradeSpec
 from abc import ABC, abstractmethod
 import math
 
@@ -11,15 +13,15 @@ class DatePercentStrategy(Strategy):
         # the duration is the number of trading days that the strategy is to purchase shares over
         self.duration = duration
         self.num_trades = 0
-        self.purchase_df = None
+        self.purchase_prices = None
 
     def execute_strategy(self, stock_df):
-        # generate the row identifiers to obtain the information for purchase
-        self.purchase_df = self.generate_purchase_ids(stock_df)
+        # generate the prices on the days that correspond to purchases for this strategy
+        self.purchase_prices = self.generate_purchase_ids(stock_df)
         self.purchase_from_purchase_df()
 
     @abstractmethod
-    # return the row identifiers of the days that will correspond to stock purchases for this strategy
+    # return the prices on the days that will correspond to stock purchases for this strategy
     def generate_purchase_ids(self, stock_df):
         pass
 
@@ -27,10 +29,23 @@ class DatePercentStrategy(Strategy):
     def purchase_from_purchase_df(self):
         pass
 
+    # method that will return the limit order prices on the days in the duration where the low is over the specified
+    # percentage down as compared to the open
+    def get_down_percent_prices(self, stock_df):
+        purchase_ids = stock_df.down_days(self.percent_down, self.duration)
+        return stock_df["Open"][purchase_ids] * (1 - self.percent_down / 100)
+
+    # method that will return the limit order price if the bar is within the duration and its low is over the specified
+    # percentage down as compared to the open, None otherwise
+    def get_down_percent_price(self, bar):
+        if self.bars_seen < self.duration and bar["Low"] / bar["Open"] < PercentDownIndex.threshold(self.percent_down):
+            return bar["Open"] * (1 - self.percent_down / 100)
+        return None
+
     # method that will clear the results from a strategy for a new trial
     def clear(self):
         super().clear()
-        self.purchase_df = None
+        self.purchase_prices = None
 
 
 # class that will be a strategy for trading based on the s & p being down a specfic percentage point during a day
@@ -42,46 +57,75 @@ class DatePercentStrategyLimitedFunds(DatePercentStrategy):
         self.funds = total_to_spend
         self.order_amount = None
 
-    # return the row identifiers of the days that will correspond to stock purchases for this strategy
+    def params(self):
+        return type(self).__name__, self.percent_down, self.duration, self.to_spend
+
+    def spec(self):
+        if type(self) is not DatePercentStrategyLimitedFunds:
+            return None
+        return LimitedFundsSpec(self.percent_down, self.duration, self.to_spend)
+
+    # return the prices on the days that will correspond to stock purchases for this strategy
     def generate_purchase_ids(self, stock_df):
         # compute the ceiling of the average number of days where the percentage down is expected to be satisfied
-        # and return the df that has been filtered to here to avoid unnecessary computation
-        temp = self.get_average_times(stock_df)
-        temp = temp[temp.index < self.duration]
-        down_percent = temp["Open"] * (1 - self.percent_down / 100)
-        temp["PurchasePrice"] = down_percent
+        self.get_average_times(stock_df)
+        down_percent = self.get_down_percent_prices(stock_df)
         # note that due to the manner in which order_amount is defined it will likely be the case
         # that the total number of dollars will not be fully allocated
-        self.order_amount = self.to_spend / self.num_trades
-        # print(temp)
+        self.order_amount = self.order_amount_for(self.num_trades)
+        # print(down_percent)
+
+        return down_percent
 
-        return temp
+    # method that will return the amount of each order for an estimated number of trades
+    # if no days were down the percentage there are no trades to spread the funds over, so the order amount is
+    # infinite and no purchases are made, as in execute_limited_funds_grid
+    def order_amount_for(self, num_trades):
+        if num_trades == 0:
+            return math.inf
+        return self.to_spend / num_trades
 
     # method that will determine the average number of times that the specific percentage down is met
     # for the duration in the whole df
     def get_average_times(self, stock_df):
-        # obtain the total number of examples
-        total_ex = len(stock_df.index)
+        # obtain the total number of examples from the start of the window to the end of the history
+        total_ex = stock_df.tail_length()
         # obtain the proportion of the total examples are captured in the duration
         proportion_duration = total_ex / self.duration
-        # obtain df with all the times that the specified percentage down has occured
-        temp = stock_df[stock_df["Low"] / stock_df["Open"] < (1 - self.percent_down / 100)]
+        # obtain the number of times that the specified percentage down has occured from the shared index
+        times_down = stock_df.tail_down_count(self.percent_down)
         # take the ceiling of the average number of times this percentage down was observed
         # over the duration period => try to deploy all capital for trading
-        self.num_trades = math.ceil(len(temp.index) / proportion_duration)
+        self.num_trades = math.ceil(times_down / proportion_duration)
 
-        # note that we have a df with only the examples satisfying the percentage down condition
-        # return this to be used in generate purchase_ids
-        return temp
+        return self.num_trades
 
     def purchase_from_purchase_df(self):
         # ensure that if the strategy runs out of funds it terminates
-        for price in self.purchase_df['PurchasePrice']:
+        for price in self.purchase_prices.tolist():
             if self.funds < self.order_amount:
                 break
             self.buy_in_dollars(self.order_amount, price)
             self.funds -= self.order_amount
 
+    # method that will begin streaming, the number of trades is estimated from the days after the start of the trial
+    # which are not known while streaming, so it should be passed in, eg from get_average_times on the history so far
+    # without it the funds are spread over every day the strategy buys on (the duration, or days if it is shorter)
+    # so that they can never run out
+    def start_stream(self, days=None, num_trades=None):
+        super().start_stream(days, num_trades)
+        if num_trades is None:
+            num_trades = self.duration if days is None else min(self.duration, days)
+        self.num_trades = num_trades
+        self.order_amount = self.order_amount_for(self.num_trades)
+
+    def purchase_on_bar(self, bar):
+        price = self.get_down_percent_price(bar)
+        # the funds only decrease so once they cannot cover an order no more purchases are made, as in the batch path
+        if price is not None and self.funds >= self.order_amount:
+            self.buy_in_dollars(self.order_amount, price)
+            self.funds -= self.order_amount
+
     # method that will clear the results from a strategy for a new trial
     def clear(self):
         super().clear()
@@ -96,19 +140,29 @@ class DatePercentStrategyConstTrade(DatePercentStrategy):
         super().__init__(name, percent_down, duration)
         self.order_amount = order_amount
 
-    # return the row identifiers of the days that will correspond to stock purchases for this strategy
+    def params(self):
+        return type(self).__name__, self.percent_down, self.duration, self.order_amount
+
+    def spec(self):
+        if type(self) is not DatePercentStrategyConstTrade:
+            return None
+        return ConstTradeSpec(self.percent_down, self.duration, self.order_amount)
+
+    # return the prices on the days that will correspond to stock purchases for this strategy
     def generate_purchase_ids(self, stock_df):
         # get all the days in which the low is over the specified percentage down as compared to the open
         # ie a limit market order could have been placed at the open that would execute
-        temp = stock_df[stock_df.index < self.duration]
-        temp = temp[temp["Low"] / temp["Open"] < (1 - self.percent_down / 100)]
-        down_percent = temp["Open"] * (1 - self.percent_down / 100)
-        temp["PurchasePrice"] = down_percent
-        # print(temp)
+        down_percent = self.get_down_percent_prices(stock_df)
+        # print(down_percent)
 
-        return temp
+        return down_percent
 
     def purchase_from_purchase_df(self):
         # ensure that if the strategy runs out of funds it terminates
-        for price in self.purchase_df['PurchasePrice']:
+        for price in self.purchase_prices.tolist():
+            self.buy_in_dollars(self.order_amount, price)
+
+    def purchase_on_bar(self, bar):
+        price = self.get_down_percent_price(bar)
+        if price is not None:
             self.buy_in_dollars(self.order_amount, price)
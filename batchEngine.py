@@ -0,0 +1,186 @@
+import numpy as np
+
+
+# the layout of the last axis of the arrays returned by the batch engine, this matches the layout of
+# Strategy.results_copy so that rows can be passed directly to ResultAccumulator.accum_results
+# [num trades, total spent, final total, total net returns, percentage return]
+RESULT_FIELDS = ("total_orders", "cost_basis_total", "final_total", "net_returns", "percentage_return")
+
+
+# method that will return the number of purchases a time strategy makes over the duration
+# this is the number of rows with index < duration and index % interval == 0
+def time_strategy_counts(intervals, duration):
+    intervals = np.asarray(intervals, dtype=np.int64)
+    return (duration - 1) // intervals + 1
+
+
+# method that will compute the final total, net return and percentage return from the shares held and the cost basis
+# in the same manner as Strategy.current_total_price, Strategy.get_net_returns and Strategy.get_percent_return
+def finish_results(total_orders, num_shares, cost_basis_total, share_price):
+    final_total = share_price * num_shares
+    net_returns = final_total - cost_basis_total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage_return = np.where(cost_basis_total != 0, final_total / cost_basis_total - 1, 0.0)
+
+    results = np.empty(num_shares.shape + (len(RESULT_FIELDS),))
+    results[..., 0] = total_orders
+    results[..., 1] = cost_basis_total
+    results[..., 2] = final_total
+    results[..., 3] = net_returns
+    results[..., 4] = percentage_return
+    return results
+
+
+# method that will execute every time interval strategy for every trial at once
+# prices is the Open or Close column of the whole history as an array, starts holds the row of the history at which
+# each trial begins and intervals holds the interval of each strategy
+# returns an array of shape (len(starts), len(intervals), 5) laid out as RESULT_FIELDS
+def execute_time_strategies(prices, starts, intervals, duration, to_spend, share_price):
+    prices = np.asarray(prices, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    intervals = np.asarray(intervals, dtype=np.int64)
+
+    # sort the strategies from the most purchases to the fewest so that the strategies still purchasing on the j-th
+    # purchase are always a prefix of the sorted strategies
+    order = np.argsort(intervals, kind="stable")
+    sorted_intervals = intervals[order]
+    counts = time_strategy_counts(sorted_intervals, duration)
+    # note that this is computed exactly as TimeStrategy.generate_purchase_ids computes order_amount
+    order_amounts = to_spend / counts
+
+    num_shares = np.zeros((len(starts), len(intervals)))
+    cost_basis_total = np.zeros((len(starts), len(intervals)))
+    # the shares are accumulated one purchase at a time (vectorized over trials and strategies) so that the sums are
+    # performed in the same order as the repeated calls to buy_in_dollars and the results are identical
+    for j in range(int(counts.max()) if len(counts) else 0):
+        active = np.searchsorted(-counts, -j, side="left")
+        purchase_prices = prices[starts[:, None] + j * sorted_intervals[None, :active]]
+        num_shares[:, :active] += order_amounts[:active] / purchase_prices
+        cost_basis_total[:, :active] += order_amounts[:active]
+
+    results = finish_results(counts, num_shares, cost_basis_total, share_price)
+    # put the strategies back in the order that they were passed in
+    unsorted = np.empty_like(results)
+    unsorted[:, order] = results
+    return unsorted
+
+
+# method that will return every start row that a trial of the given number of days can begin on
+# these are the starts that draw_start can return
+def all_starts(length, days):
+    return np.arange(1, length - days + 1, dtype=np.int64)
+
+
+# method that will compute the strided prefix sums of values for an interval
+# ie prefix[i] = values[i] + values[i - interval] + values[i - 2 * interval] + ... for every row i
+def strided_prefix_sums(values, interval):
+    rows = -(-len(values) // interval)
+    padded = np.zeros(rows * interval)
+    padded[:len(values)] = values
+    # every column of the reshaped values holds the rows that share a remainder mod interval
+    return np.cumsum(padded.reshape(rows, interval), axis=0).reshape(-1)[:len(values)]
+
+
+# method that will execute every time interval strategy on every possible trial start rather than random starts
+# the shares bought over a trial are the order amount times the sum of 1 / price over the purchase rows, which is the
+# difference of two strided prefix sums, so all starts of an interval are evaluated in O(length) time
+# share_price is either a single price or the price that each start is valued at
+# returns an array of shape (len(starts), len(intervals), 5) laid out as RESULT_FIELDS
+# note that the sums are differences of prefix sums rather than sums of the purchases in order, so they match
+# execute_time_strategies only to within floating point rounding that grows with the length of the history, the final
+# totals of a 2000 row history differ by around 1e-14 relative, but net and percentage returns near 0 lose more
+# relative precision (up to a few 1e-10 there, and more on longer histories), so compare them with a tolerance
+def exhaustive_time_strategies(prices, intervals, duration, to_spend, share_price, starts=None):
+    prices = np.asarray(prices, dtype=np.float64)
+    intervals = np.asarray(intervals, dtype=np.int64)
+    if starts is None:
+        starts = all_starts(len(prices), duration)
+    starts = np.asarray(starts, dtype=np.int64)
+    share_price = np.asarray(share_price, dtype=np.float64)
+    if share_price.ndim == 1:
+        share_price = share_price[:, None]
+
+    counts = time_strategy_counts(intervals, duration)
+    order_amounts = to_spend / counts
+    inverse_prices = 1 / prices
+
+    num_shares = np.empty((len(starts), len(intervals)))
+    for k in range(len(intervals)):
+        prefix = strided_prefix_sums(inverse_prices, intervals[k])
+        last = starts + (counts[k] - 1) * intervals[k]
+        before = starts - intervals[k]
+        inverse_sum = prefix[last] - np.where(before >= 0, prefix[np.maximum(before, 0)], 0.0)
+        num_shares[:, k] = order_amounts[k] * inverse_sum
+
+    cost_basis_total = np.broadcast_to(order_amounts * counts, num_shares.shape)
+    return finish_results(counts, num_shares, cost_basis_total, share_price)
+
+
+# method that will execute a grid of DatePercentStrategyLimitedFunds parameters for every trial at once
+# the g-th strategy of the grid buys when the low is percents_down[g] percent under the open, spends at most
+# totals_to_spend[g] and buys over the first durations[g] days of each trial of days rows starting at starts
+# open_prices is the Open column of the whole history and percent_index is its PercentDownIndex
+# returns an array of shape (len(starts), len(grid), 5) laid out as RESULT_FIELDS that is identical to executing each
+# strategy on its own
+def execute_limited_funds_grid(open_prices, percent_index, percents_down, totals_to_spend, durations, starts, days,
+                               share_price):
+    open_prices = np.asarray(open_prices, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)[:, None]
+    durations = np.asarray(durations, dtype=np.int64)
+    totals_to_spend = np.asarray(totals_to_spend, dtype=np.float64)
+
+    # lay the purchase prices of the qualifying days of every distinct percentage end to end so every strategy of the
+    # grid can gather its purchases from a single array, offsets holds where each strategy's days begin
+    distinct = {}
+    qualifying_days = []
+    purchase_prices = []
+    offsets = np.empty(len(percents_down), dtype=np.int64)
+    num_qualifying = np.empty(len(percents_down), dtype=np.int64)
+    position = 0
+    for g, percent_down in enumerate(percents_down):
+        if percent_down not in distinct:
+            days_down = percent_index.days(percent_down)
+            distinct[percent_down] = (position, len(days_down))
+            qualifying_days.append(days_down)
+            purchase_prices.append(open_prices[days_down] * (1 - percent_down / 100))
+            position += len(days_down)
+        offsets[g], num_qualifying[g] = distinct[percent_down]
+    qualifying_days = np.concatenate(qualifying_days) if qualifying_days else np.empty(0, dtype=np.int64)
+    purchase_prices = np.concatenate(purchase_prices) if purchase_prices else np.empty(0)
+
+    # the qualifying days of a strategy from the start of each trial to the end of its duration and of the history
+    # found with a binary search of the strategy's sorted qualifying days
+    first = np.empty((len(starts), len(percents_down)), dtype=np.int64)
+    window_counts = np.empty_like(first)
+    window_ends = starts + np.minimum(durations, days)
+    for g in range(len(percents_down)):
+        days_down = qualifying_days[offsets[g]:offsets[g] + num_qualifying[g]]
+        first[:, g] = np.searchsorted(days_down, starts[:, 0], side="left")
+        window_counts[:, g] = np.searchsorted(days_down, window_ends[:, g], side="left") - first[:, g]
+    tail_counts = num_qualifying - first
+
+    # the estimate of the number of trades in the same manner as DatePercentStrategyLimitedFunds.get_average_times
+    proportion_duration = (len(open_prices) - starts) / durations
+    num_trades = np.ceil(tail_counts / proportion_duration)
+    # with no qualifying days the order amount is infinite so no purchases are made, as in order_amount_for
+    with np.errstate(divide="ignore"):
+        order_amounts = totals_to_spend / num_trades
+
+    # purchase the qualifying days in order, each purchase is only made while the remaining funds cover the order
+    # the funds are reduced one order at a time (vectorized over trials and strategies) so the purchases that are made
+    # and the sums are identical to purchase_from_purchase_df
+    funds = np.broadcast_to(totals_to_spend, first.shape).copy()
+    num_shares = np.zeros(first.shape)
+    cost_basis_total = np.zeros(first.shape)
+    total_orders = np.zeros(first.shape, dtype=np.int64)
+    for j in range(int(window_counts.max()) if window_counts.size else 0):
+        buying = (j < window_counts) & (funds >= order_amounts)
+        if not buying.any():
+            break
+        prices = purchase_prices[np.where(buying, offsets + first + j, 0)]
+        num_shares[buying] += order_amounts[buying] / prices[buying]
+        cost_basis_total[buying] += order_amounts[buying]
+        funds[buying] -= order_amounts[buying]
+        total_orders += buying
+
+    return finish_results(total_orders, num_shares, cost_basis_total, share_price)
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import main
+from strategy import TimeStrategy
+from strategySearch import get_best_time_strategies
+from trialRunner import make_test_df, test_strategies
+from DatePercentStrategy import DatePercentStrategyLimitedFunds, DatePercentStrategyConstTrade
+from priceLoader import load_columns
+from priceWindow import PriceHistory
+from syntheticPrices import generate_gbm_prices, write_sqlite
+
+# the number of days in a trial, the amount to spend and the amount per trade used in main.py
+TRIAL_DAYS = 254
+TO_SPEND = 100000
+TRADE_AMOUNT = 500
+
+
+# method that will return the fastest wall time of running function repeat times and the peak memory that is
+# allocated by a separate run of function, the memory run is separate as tracing the allocations slows down the run
+def measure(function, repeat):
+    seconds = float("inf")
+    for i in range(repeat):
+        random.seed(i)
+        start = time.perf_counter()
+        function()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    random.seed(0)
+    tracemalloc.start()
+    function()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak_bytes
+
+
+# method that will make a run of trials of a single strategy executed trial by trial
+def strategy_trials(strategy, sp_hist, trials):
+    def run():
+        for i in range(trials):
+            strategy.execute_strategy(make_test_df(sp_hist, TRIAL_DAYS))
+            strategy.clear()
+    return run
+
+
+# method that will run the benchmarks for a single history length
+# returns a list of records with the stage, its parameters, the fastest wall time and the peak memory
+def benchmark_length(length, trial_counts, strategy_counts, repeat, seed):
+    records = []
+
+    def record(stage, function, trials=0, strategies=0):
+        seconds, peak_bytes = measure(function, repeat)
+        records.append({"stage": stage, "length": length, "trials": trials, "strategies": strategies,
+                        "seconds": seconds, "peak_bytes": peak_bytes})
+        print("%-24s length=%-9d trials=%-7d strategies=%-5d %10.4fs %12d bytes" %
+              (stage, length, trials, strategies, seconds, peak_bytes))
+
+    columns = generate_gbm_prices(length, seed)
+    with tempfile.TemporaryDirectory() as directory:
+        write_sqlite(columns, os.path.join(directory, "sp.db"))
+        db_path = os.path.join(directory, "sp.db")
+        record("load_columns_uncached", lambda: load_columns(db_path, use_cache=False))
+        # load_db reads sp.db from the working directory and builds its dataframe from the cached columns
+        working_directory = os.getcwd()
+        os.chdir(directory)
+        try:
+            main.load_db()
+            record("load_db_cached", main.load_db)
+        finally:
+            os.chdir(working_directory)
+
+    sp_hist = PriceHistory.from_columns(columns)
+    for trials in trial_counts:
+        record("make_test_df", lambda: [make_test_df(sp_hist, TRIAL_DAYS) for i in range(trials)], trials)
+        record("time_strategy", strategy_trials(TimeStrategy("every 130 days", 130, TRIAL_DAYS, TO_SPEND, "Open"),
+                                                sp_hist, trials), trials, 1)
+        record("percent_limited_funds", strategy_trials(
+            DatePercentStrategyLimitedFunds("1% down limited", 1, TRIAL_DAYS, TO_SPEND), sp_hist, trials), trials, 1)
+        record("percent_const_trade", strategy_trials(
+            DatePercentStrategyConstTrade("1% down const trade", 1, TRIAL_DAYS, TRADE_AMOUNT), sp_hist, trials),
+            trials, 1)
+        for num_strategies in strategy_counts:
+            strategies = [TimeStrategy("every " + str(i) + " days", i, TRIAL_DAYS, TO_SPEND, "Open")
+                          for i in range(1, num_strategies + 1)]
+            record("time_sweep", lambda: test_strategies(strategies, sp_hist, TRIAL_DAYS, trials, False),
+                   trials, num_strategies)
+        record("get_best_time_strategies",
+               lambda: get_best_time_strategies(sp_hist, TRIAL_DAYS, TO_SPEND, "Open", trials), trials, 253)
+
+    return records
+
+
+# method that will compare the records of a run to the records of a previous run and print every stage that is slower
+# by more than the tolerance, stages that are slower by less than min_seconds are not counted as they are mostly noise
+# returns the number of regressions
+def compare(records, previous_records, tolerance, min_seconds):
+    previous = {}
+    for previous_record in previous_records:
+        key = (previous_record["stage"], previous_record["length"], previous_record["trials"],
+               previous_record["strategies"])
+        previous[key] = previous_record
+
+    regressions = 0
+    print("\nComparison to the previous run:")
+    for record in records:
+        key = (record["stage"], record["length"], record["trials"], record["strategies"])
+        if key not in previous:
+            continue
+        ratio = record["seconds"] / max(previous[key]["seconds"], 1e-9)
+        flag = ""
+        if ratio > tolerance and record["seconds"] - previous[key]["seconds"] > min_seconds:
+            flag = "  REGRESSION"
+            regressions += 1
+        print("%-24s length=%-9d trials=%-7d strategies=%-5d %6.2fx time %6.2fx memory%s" %
+              (key + (ratio, record["peak_bytes"] / max(previous[key]["peak_bytes"], 1), flag)))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the backtest hot paths on synthetic price histories")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[5000, 50000, 500000],
+                        help="the number of days in each synthetic history")
+    parser.add_argument("--trials", type=int, nargs="+", default=[50, 200], help="the numbers of trials")
+    parser.add_argument("--strategies", type=int, nargs="+", default=[16, 64, 253],
+                        help="the numbers of time strategies in the sweep")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of timed runs of each stage")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the synthetic histories")
+    parser.add_argument("--output", default="benchmark_results.json", help="the file the results are written to")
+    parser.add_argument("--compare", help="a results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="the slowdown relative to the previous run that counts as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.005,
+                        help="the smallest slowdown in seconds that counts as a regression")
+    args = parser.parse_args()
+
+    all_records = []
+    for history_length in args.lengths:
+        all_records += benchmark_length(history_length, args.trials, args.strategies, args.repeat, args.seed)
+
+    with open(args.output, "w") as output_file:
+        json.dump(all_records, output_file, indent=1)
+    print("\nResults written to " + args.output)
+
+    if args.compare:
+        with open(args.compare) as compare_file:
+            if compare(all_records, json.load(compare_file), args.tolerance, args.min_seconds):
+                raise SystemExit(1)
@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import sys
+
+# note that only the standard library is imported here, every subcommand imports the modules it needs when it runs
+# so that report starts without importing NumPy, pandas or yfinance
+
+# the settings that are used when they are given neither as a flag nor in the config file
+# these are the values that were hard coded in main.py
+DEFAULTS = {
+    "ticker": "VOO",
+    "db": "sp.db",
+    "source": "yfinance",
+    "csv_dir": ".",
+    "trial_days": 254,
+    "trials": 200,
+    "to_spend": 100000,
+    "trade_amount": 500,
+    "time": "Open",
+    "seed": 0,
+    "top_n": 10,
+    "mode": "plan",
+    "share_price": None,
+    "percents_down": [1, 1.5, 1.75, 0.9],
+    "const_trade_percents": [0.9],
+    "cache_dir": ".result_cache",
+    "train_days": 5 * 252,
+    "test_days": 2 * 252,
+    "step": None,
+    "anchored": False,
+    "valuation": "latest",
+    "output": "results.json",
+}
+
+
+# method that will fill in the settings that were not given as flags from the config file and then the defaults
+def resolve_settings(args):
+    config = {}
+    if args.config is not None:
+        with open(args.config) as config_file:
+            config = json.load(config_file)
+        unknown = set(config) - set(DEFAULTS)
+        if unknown:
+            raise SystemExit("unknown settings in " + args.config + ": " + ", ".join(sorted(unknown)))
+
+    for name, default in DEFAULTS.items():
+        if getattr(args, name, None) is None:
+            setattr(args, name, config.get(name, default))
+    return args
+
+
+# method that will make the price source named by the settings
+def make_source(args):
+    from priceStore import CsvPriceSource, YFinancePriceSource
+    if args.source == "csv":
+        return CsvPriceSource(args.csv_dir)
+    return YFinancePriceSource()
+
+
+# method that will load the price history of the ticker, importing or fetching the prices if the store has none
+def load_history(args):
+    from priceLoader import load_price_history
+    return load_price_history(args.ticker, args.db, make_source(args))
+
+
+# method that will write a report of the summaries of accumulated results (or of the folds of a walk forward) to the
+# output file as json, the report holds the settings that produced it so that it can be read back without recomputing
+def write_report(args, command, summaries, key="strategies"):
+    report = {"command": command,
+              "settings": {name: getattr(args, name) for name in DEFAULTS if name not in ("output", "cache_dir")},
+              key: summaries}
+    temp_path = args.output + ".tmp"
+    with open(temp_path, "w") as report_file:
+        json.dump(report, report_file, indent=1)
+    os.replace(temp_path, args.output)
+    print("Wrote " + str(len(summaries)) + " " + key + " to " + args.output)
+    return report
+
+
+# method that will run the search for the best time interval strategies and return the optimal finder
+def find_best_time_strategies(args, sp_hist):
+    from strategySearch import get_best_time_strategies
+    from resultCache import ResultCache
+    from trialPlan import TrialPlan
+
+    plan = TrialPlan.create(sp_hist, args.trial_days, args.trials, args.seed)
+    cache = ResultCache(args.cache_dir)
+    optimal = get_best_time_strategies(sp_hist, args.trial_days, args.to_spend, args.time, args.trials,
+                                       adaptive=args.mode == "adaptive", seed=args.seed, plan=plan, cache=cache,
+                                       exhaustive=args.mode == "exhaustive", top_n=args.top_n,
+                                       share_price=args.share_price)
+    return optimal, plan, cache
+
+
+# method that will bring the prices of the ticker in the store up to date
+def ingest(args):
+    from priceStore import PriceStore
+    store = PriceStore(args.db)
+    if store.last_date(args.ticker) is None:
+        # the first ingest imports the legacy sp table or downloads the whole history
+        load_history(args)
+        added = len(store.load_columns(args.ticker)["Date"])
+    else:
+        added = store.refresh(args.ticker, make_source(args))
+    print("Added " + str(added) + " days of " + args.ticker + ", prices up to " + str(store.last_date(args.ticker)))
+
+
+# method that will search for the best time interval strategies and write them to the report
+def sweep(args):
+    sp_hist = load_history(args)
+    optimal, plan, cache = find_best_time_strategies(args, sp_hist)
+    summaries = [summary for avg_total, spec, summary in optimal.get_strategies()]
+    write_report(args, "sweep", summaries)
+    print_report_table(summaries)
+
+
+# method that will compare the best time interval strategies with the percent strategies on the same trials and write
+# the results to the report, this is what running main.py did
+def compare(args):
+    from DatePercentStrategy import DatePercentStrategyLimitedFunds, DatePercentStrategyConstTrade
+    from trialPlan import test_strategies_on_plan
+
+    sp_hist = load_history(args)
+    optimal, plan, cache = find_best_time_strategies(args, sp_hist)
+    strats = optimal.get_optimal_list_time(args.trial_days, args.to_spend, args.time)
+    for percent_down in args.percents_down:
+        strats.append(DatePercentStrategyLimitedFunds(str(percent_down) + "% down limited", percent_down,
+                                                      args.trial_days, args.to_spend))
+    for percent_down in args.const_trade_percents:
+        strats.append(DatePercentStrategyConstTrade(str(percent_down) + "% down const trade", percent_down,
+                                                    args.trial_days, args.trade_amount))
+
+    summaries = [accum.summary() for accum in test_strategies_on_plan(strats, sp_hist, plan, False, args.share_price,
+                                                                      cache)]
+    write_report(args, "compare", summaries)
+    print_report_table(summaries)
+
+
+# method that will run a walk forward optimization of the time strategies and write the folds to the report
+def walkforward(args):
+    from strategySearch import walk_forward_time_strategies
+
+    sp_hist = load_history(args)
+    folds = walk_forward_time_strategies(sp_hist, args.trial_days, args.to_spend, args.time, args.train_days,
+                                         args.test_days, args.top_n, args.step, args.anchored, args.valuation)
+    write_report(args, "walkforward", folds, "folds")
+    print_fold_table(folds)
+
+
+# method that will print the training and testing returns of the best strategy of each fold of a walk forward, the
+# average testing return of the top strategies, the best testing return of any strategy and the testing rank of the
+# best strategy in training
+def print_fold_table(folds):
+    print("%-25s %-25s %-18s %9s %9s %9s %9s %6s" % ("train", "test", "best", "train", "test", "top test",
+                                                     "oracle", "rank"))
+    for fold in folds:
+        train_span = " to ".join(str(value) for value in fold.get("train_dates", fold["train_rows"]))
+        test_span = " to ".join(str(value) for value in fold.get("test_dates", fold["test_rows"]))
+        best = fold["top"][0]
+        top_test = sum(entry["test"]["return"] for entry in fold["top"]) / len(fold["top"])
+        print("%-25s %-25s %-18s %8.2f%% %8.2f%% %8.2f%% %8.2f%% %6d" %
+              (train_span, test_span, best["train"]["name"][:18], best["train"]["return"] * 100,
+               best["test"]["return"] * 100, top_test * 100, fold["best_test_return"] * 100,
+               fold["test_rank_of_best"]))
+
+
+# method that will print the summaries of strategies as a table sorted from the greatest to the least return
+def print_report_table(summaries):
+    print("%-40s %7s %9s %9s %9s %9s %9s" % ("strategy", "trials", "return", "std", "p5", "p50", "p95"))
+    for summary in sorted(summaries, key=lambda summary: -summary["return"]):
+        print("%-40s %7d %8.2f%% %8.2f%% %8.2f%% %8.2f%% %8.2f%%" %
+              (summary["name"][:40], summary["trials"], summary["return"] * 100, summary["return_std"] * 100,
+               summary["return_p5"] * 100, summary["return_p50"] * 100, summary["return_p95"] * 100))
+
+
+# method that will print a report written by sweep, compare or walkforward without recomputing or importing anything
+# heavy
+def report(args):
+    with open(args.input) as report_file:
+        saved = json.load(report_file)
+    settings = saved["settings"]
+    if saved["command"] == "walkforward":
+        print("walkforward of " + str(settings["ticker"]) + ": training on " + str(settings["train_days"]) +
+              " days and testing on " + str(settings["test_days"]) + " days with trials of " +
+              str(settings["trial_days"]) + " days valued at the " + settings["valuation"] + " close")
+    else:
+        print(saved["command"] + " of " + str(settings["ticker"]) + " (" + settings["mode"] + "): " +
+              str(settings["trials"]) + " trials of " + str(settings["trial_days"]) + " days, $" +
+              str(settings["to_spend"]) + " to spend, seed " + str(settings["seed"]))
+    if "folds" in saved:
+        print_fold_table(saved["folds"])
+    elif args.verbose:
+        for summary in saved["strategies"]:
+            print("\nPerformance Summary for " + summary["name"])
+            for name, value in summary.items():
+                if name != "name":
+                    print(name + ": " + str(value))
+    else:
+        print_report_table(saved["strategies"])
+
+
+# method that will add the flags that configure the prices and the trials to a subcommand
+# every flag defaults to None so that the config file and then DEFAULTS fill in the flags that are not given
+def add_settings(parser, trials=True):
+    parser.add_argument("--config", help="json file of settings, flags take precedence over it")
+    parser.add_argument("--ticker")
+    parser.add_argument("--db", help="sqlite db of the price store")
+    parser.add_argument("--source", choices=("yfinance", "csv"), help="where missing prices are fetched from")
+    parser.add_argument("--csv-dir", help="directory of <ticker>.csv files for --source csv")
+    parser.add_argument("--instrument", action="store_true",
+                        help="record the time, calls and rows of the hot paths and print them at the end")
+    parser.add_argument("--trace", help="with --instrument, write every call to this file as json lines")
+    if not trials:
+        return
+    parser.add_argument("--trial-days", type=int)
+    parser.add_argument("--trials", type=int)
+    parser.add_argument("--to-spend", type=float)
+    parser.add_argument("--trade-amount", type=float)
+    parser.add_argument("--time", choices=("Open", "Close"))
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--top-n", type=int)
+    parser.add_argument("--mode", choices=("plan", "adaptive", "exhaustive"),
+                        help="test every interval on the trial plan, race them or test every start date")
+    parser.add_argument("--share-price", type=float, help="price the shares are valued at, the latest close if unset")
+    parser.add_argument("--percents-down", type=float, nargs="*")
+    parser.add_argument("--const-trade-percents", type=float, nargs="*")
+    parser.add_argument("--cache-dir", help="directory of the result cache")
+    parser.add_argument("--train-days", type=int, help="rows of the history each walk forward fold trains on")
+    parser.add_argument("--test-days", type=int, help="rows of the history each walk forward fold tests on")
+    parser.add_argument("--step", type=int, help="rows that the walk forward folds advance by, --test-days if unset")
+    parser.add_argument("--anchored", action="store_true", default=None, help="train every fold from the first row")
+    parser.add_argument("--valuation", choices=("latest", "window_end"),
+                        help="value the shares of a walk forward trial at the latest close or the trial's last close")
+    parser.add_argument("--output", help="json file the report is written to")
+
+
+# method that will make the parser of the command line
+def make_parser():
+    parser = argparse.ArgumentParser(description="Backtest dollar cost averaging strategies on S&P 500 prices")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="bring the stored prices up to date")
+    add_settings(ingest_parser, trials=False)
+    ingest_parser.set_defaults(function=ingest)
+
+    sweep_parser = subparsers.add_parser("sweep", help="find the best time interval strategies")
+    add_settings(sweep_parser)
+    sweep_parser.set_defaults(function=sweep)
+
+    compare_parser = subparsers.add_parser("compare", help="compare the best time interval strategies with the "
+                                                           "percent strategies")
+    add_settings(compare_parser)
+    compare_parser.set_defaults(function=compare)
+
+    walkforward_parser = subparsers.add_parser("walkforward", help="pick the best time interval strategies on rolling "
+                                                                   "training windows and test them on the next window")
+    add_settings(walkforward_parser)
+    walkforward_parser.set_defaults(function=walkforward)
+
+    report_parser = subparsers.add_parser("report", help="print a report written by sweep, compare or walkforward")
+    report_parser.add_argument("input", nargs="?", default=DEFAULTS["output"])
+    report_parser.add_argument("--verbose", action="store_true", help="print every statistic of every strategy")
+    report_parser.set_defaults(function=report)
+    return parser
+
+
+# method that will run the command line with the given arguments
+def run(argv=None):
+    args = make_parser().parse_args(argv)
+    if args.command != "report":
+        resolve_settings(args)
+    if not getattr(args, "instrument", False):
+        args.function(args)
+        return
+
+    import instrumentation
+    instrumentation.enable(args.trace, print_summary=False)
+    try:
+        args.function(args)
+    finally:
+        print("\n" + instrumentation.disable().summary_table())
+
+
+if __name__ == '__main__':
+    run(sys.argv[1:])
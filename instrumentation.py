@@ -0,0 +1,274 @@
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from functools import wraps
+
+# the tracer that is recording the run, None when instrumentation is disabled
+tracer = None
+# the original functions that were replaced by enable, restored by disable
+patched = []
+# the number of runner entry points that are running, so that only the outermost one prints the summary table
+running = 0
+
+
+# class that will record the wall time, calls, rows touched and bytes allocated of every instrumented stage
+# the totals are kept per (stage, strategy class) and every call is also written to a trace if a path is given
+class Tracer:
+    def __init__(self, trace_path=None, trace_format="jsonl", track_memory=False, print_summary=True):
+        self.trace_path = trace_path
+        self.trace_format = trace_format
+        self.track_memory = track_memory
+        self.print_summary = print_summary
+        # whether tracemalloc was started for the tracer, so that it is only stopped if it was not already tracing
+        self.started_tracemalloc = False
+        # dict from (stage, strategy class) to [calls, seconds, rows, bytes]
+        self.totals = {}
+        self.events = []
+        self.trace_file = None
+        self.origin = time.perf_counter()
+        if trace_path is not None and trace_format == "jsonl":
+            self.trace_file = open(trace_path, "w")
+        elif trace_path is not None and trace_format != "chrome":
+            raise ValueError("the trace format must be jsonl or chrome")
+
+    # method that will add a call of a stage to the totals and the trace
+    def record(self, stage, category, start, seconds, rows, allocated):
+        totals = self.totals.setdefault((stage, category), [0, 0.0, 0, 0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += rows
+        totals[3] += allocated
+
+        if self.trace_file is not None:
+            self.trace_file.write(json.dumps({"stage": stage, "class": category,
+                                              "start_us": (start - self.origin) * 1e6, "duration_us": seconds * 1e6,
+                                              "rows": rows, "bytes": allocated}) + "\n")
+        elif self.trace_path is not None:
+            self.events.append({"name": stage, "cat": category, "ph": "X", "ts": (start - self.origin) * 1e6,
+                                "dur": seconds * 1e6, "pid": 0, "tid": 0, "args": {"rows": rows, "bytes": allocated}})
+
+    # method that will return the totals as a table with one row per stage and strategy class, slowest first
+    def summary_table(self):
+        lines = ["%-36s %-34s %10s %12s %14s %14s" % ("stage", "class", "calls", "seconds", "rows", "bytes")]
+        for (stage, category), (calls, seconds, rows, allocated) in sorted(self.totals.items(),
+                                                                           key=lambda item: -item[1][1]):
+            lines.append("%-36s %-34s %10d %12.4f %14d %14d" % (stage, category, calls, seconds, rows, allocated))
+        return "\n".join(lines)
+
+    # method that will finish writing the trace
+    def close(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+        elif self.trace_path is not None:
+            with open(self.trace_path, "w") as trace_file:
+                json.dump({"traceEvents": self.events}, trace_file)
+
+
+# method that will return the number of rows that a call touches, the length of the first argument that has one
+def rows_of(args, result):
+    for arg in args:
+        if hasattr(arg, "__len__") and not isinstance(arg, str):
+            return len(arg)
+    return 0
+
+
+# method that will return the number of rows that a method call touches, ignoring the instance
+def method_rows_of(args, result):
+    return rows_of(args[1:], result)
+
+
+# method that will return the number of purchases a strategy made from its purchase prices
+def purchase_rows(args, result):
+    return len(args[0].purchase_prices)
+
+
+# method that will wrap a function so that every call is recorded by the tracer as the given stage
+# category is the name of the strategy class for methods, found from the instance the method is called on
+def instrument(function, stage, rows=rows_of, is_method=False):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        category = type(args[0]).__name__ if is_method else ""
+        allocated_before = tracemalloc.get_traced_memory()[0] if tracer.track_memory else 0
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[0] - allocated_before if tracer.track_memory else 0
+        tracer.record(stage, category, start, seconds, rows(args, result), max(allocated, 0))
+        return result
+    return wrapper
+
+
+# method that will replace every reference to a function in the loaded modules with a replacement
+# modules that imported the function by name hold their own reference, so all of them are replaced
+def replace_function(original, replacement):
+    for module in list(sys.modules.values()):
+        module_dict = getattr(module, "__dict__", None)
+        if module_dict is None:
+            continue
+        for name, value in list(module_dict.items()):
+            if value is original:
+                module_dict[name] = replacement
+                patched.append((module_dict, name, original))
+
+
+# method that will replace a method of a class with an instrumented method
+def replace_method(cls, name, stage, rows=method_rows_of, summary=False):
+    original = cls.__dict__[name]
+    replacement = instrument(original, stage, rows, is_method=True)
+    setattr(cls, name, summarize(replacement) if summary else replacement)
+    patched.append((cls, name, original))
+
+
+# method that will wrap a runner entry point so that the summary table is printed when it returns, if print_summary
+# was passed to enable, entry points called by other entry points do not print
+def summarize(function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        global running
+        running += 1
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            running -= 1
+        if running == 0 and tracer.print_summary:
+            print("\n" + tracer.summary_table())
+        return result
+    return wrapper
+
+
+# method that will replace a runner entry point with one that is recorded as a stage and prints the summary table
+def replace_entry_point(function, stage):
+    replace_function(function, summarize(instrument(function, stage)))
+
+
+# method that will start recording the hot paths of a run
+# the functions are only replaced while instrumentation is enabled so there is no cost when it is disabled
+# trace_format is either jsonl (one json object per call) or chrome (a trace for chrome://tracing or perfetto)
+# track_memory traces the allocations with tracemalloc which is much slower
+# if print_summary the summary table is printed whenever a runner entry point (test_strategies, test_strategies_on_plan,
+# the parallel and exhaustive runners, adaptive_search and walk_forward) returns, otherwise the table is left to the
+# caller, eg from the tracer that disable returns
+# note that the stages run inside the worker processes of test_strategies_parallel are not recorded, only the wall
+# time of the whole run
+def enable(trace_path=None, trace_format="jsonl", track_memory=False, print_summary=True):
+    global tracer
+    if tracer is not None:
+        disable()
+    import batchEngine
+    import priceLoader
+    import trialPlan
+    import trialRunner
+    import walkForward
+    from strategy import TimeStrategy
+    from DatePercentStrategy import DatePercentStrategyLimitedFunds, DatePercentStrategyConstTrade
+    from priceWindow import PriceHistory
+    from resultAccumulator import ResultAccumulator
+    from optimalStrategy import OptimalStrategyFinder
+
+    tracer = Tracer(trace_path, trace_format, track_memory, print_summary)
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        tracer.started_tracemalloc = True
+
+    # the number of rows that were loaded
+    def loaded_rows(args, result):
+        return len(result["Date"])
+
+    # the number of trial starts times the number of strategies for the batch kernels
+    def batch_rows(args, result):
+        return len(args[1]) * len(args[2])
+
+    def grid_rows(args, result):
+        return len(args[5]) * len(args[2])
+
+    # the number of trial starts times the number of strategies for execute_trials
+    def trial_rows(args, result):
+        return len(args[3]) * len(args[0])
+
+    # the number of rows of the window that was made
+    def window_rows(args, result):
+        return len(result)
+
+    replace_function(priceLoader.load_columns, instrument(priceLoader.load_columns, "load_columns", loaded_rows))
+    if "main" in sys.modules:
+        replace_function(sys.modules["main"].load_db, instrument(sys.modules["main"].load_db, "load_db", window_rows))
+    replace_function(trialRunner.make_test_df, instrument(trialRunner.make_test_df, "make_test_df", window_rows))
+    replace_function(trialRunner.execute_trials, instrument(trialRunner.execute_trials, "execute_trials", trial_rows))
+    replace_function(batchEngine.execute_time_strategies, instrument(batchEngine.execute_time_strategies,
+                                                                     "execute_time_strategies", batch_rows))
+    replace_function(batchEngine.execute_limited_funds_grid, instrument(batchEngine.execute_limited_funds_grid,
+                                                                        "execute_limited_funds_grid", grid_rows))
+    replace_function(batchEngine.exhaustive_time_strategies, instrument(batchEngine.exhaustive_time_strategies,
+                                                                        "exhaustive_time_strategies"))
+    replace_method(PriceHistory, "window", "window", window_rows)
+    for cls in (TimeStrategy, DatePercentStrategyLimitedFunds, DatePercentStrategyConstTrade):
+        replace_method(cls, "generate_purchase_ids", "generate_purchase_ids")
+        replace_method(cls, "purchase_from_purchase_df", "purchase_from_purchase_df", purchase_rows)
+    replace_method(ResultAccumulator, "accum_results", "accum_results")
+    replace_method(ResultAccumulator, "accum_results_array", "accum_results_array")
+    replace_method(ResultAccumulator, "merge", "merge")
+    replace_method(OptimalStrategyFinder, "add_or_discard", "add_or_discard")
+    replace_method(OptimalStrategyFinder, "adaptive_search", "adaptive_search", summary=True)
+    replace_entry_point(trialRunner.test_strategies, "test_strategies")
+    replace_entry_point(trialRunner.test_strategies_parallel, "test_strategies_parallel")
+    replace_entry_point(trialRunner.test_time_strategies_exhaustive, "test_time_strategies_exhaustive")
+    replace_entry_point(trialRunner.execute_time_strategies_exhaustive, "execute_time_strategies_exhaustive")
+    replace_entry_point(trialPlan.test_strategies_on_plan, "test_strategies_on_plan")
+    replace_entry_point(walkForward.walk_forward, "walk_forward")
+    return tracer
+
+
+# method that will restore the original functions, finish the trace and return the tracer with the totals
+def disable():
+    global tracer
+    # restore in the reverse order so that a function that was replaced twice ends up as the original
+    while patched:
+        owner, name, original = patched.pop()
+        if isinstance(owner, dict):
+            owner[name] = original
+        else:
+            setattr(owner, name, original)
+    finished = tracer
+    if finished is not None:
+        finished.close()
+        if finished.started_tracemalloc:
+            tracemalloc.stop()
+    tracer = None
+    return finished
+
+
+# method that will profile the strategies on a single trial with cProfile and tracemalloc
+# prints the functions with the most cumulative time and the lines that allocated the most memory, and writes the
+# profile to profile_path if given so that it can be read with pstats or snakeviz
+def profile_single_trial(strategies, sp_df, days, start=None, profile_path=None, top=20):
+    from priceWindow import as_price_history
+    from trialRunner import draw_start, execute_trials
+
+    sp_hist = as_price_history(sp_df)
+    if start is None:
+        start = draw_start(sp_hist, days)
+
+    # tracing is left running if it was already started, eg by enable(track_memory=True)
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    execute_trials(strategies, sp_hist, days, [start], sp_hist.latest_close())
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot()
+    if started_tracemalloc:
+        tracemalloc.stop()
+
+    stats = pstats.Stats(profiler).sort_stats("cumulative")
+    stats.print_stats(top)
+    if profile_path is not None:
+        stats.dump_stats(profile_path)
+    print("Largest allocations:")
+    for statistic in snapshot.statistics("lineno")[:top]:
+        print(statistic)
+    return stats
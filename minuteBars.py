@@ -0,0 +1,196 @@
+import os
+import numpy as np
+from syntheticPrices import TRADING_DAYS
+from strategy import BAR_COLUMNS
+
+# the number of minute bars in a regular trading day, 9:30 to 16:00
+MINUTES_PER_DAY = 390
+# the minute of the day that trading opens
+OPEN_MINUTE = 9 * 60 + 30
+# the columns of a chunk of minute bars, Time is a datetime64[m] array
+MINUTE_COLUMNS = ("Time",) + BAR_COLUMNS
+
+
+# method that will generate minute bars for num_days business days, a chunk of days_per_chunk days at a time
+# the minute closes follow a geometric brownian motion with the same annual drift and volatility as
+# generate_gbm_prices, each day opens with a gap from the previous close and the high and low of each minute extend
+# past its open and close by a random range, the last close carries over from chunk to chunk so the chunks form one
+# continuous history, note that the random draws are made a chunk at a time so the bars depend on days_per_chunk
+# yields dicts from the column name to an array of the chunk's bars
+def generate_minute_bars(num_days, seed=0, days_per_chunk=20, start_price=100.0, drift=0.07, volatility=0.18,
+                         gap_volatility=0.003, range_volatility=0.0003, start_date="1990-01-01"):
+    rng = np.random.default_rng(seed)
+    minute_drift = (drift - volatility ** 2 / 2) / TRADING_DAYS / MINUTES_PER_DAY
+    minute_volatility = volatility / np.sqrt(TRADING_DAYS * MINUTES_PER_DAY)
+    first_day = np.datetime64(start_date, "D")
+    last_close = start_price
+
+    for first in range(0, num_days, days_per_chunk):
+        chunk_days = min(days_per_chunk, num_days - first)
+        num_bars = chunk_days * MINUTES_PER_DAY
+        returns = minute_drift + minute_volatility * rng.standard_normal(num_bars)
+        # the first minute of each day also gaps from the previous close
+        returns[::MINUTES_PER_DAY] += gap_volatility * rng.standard_normal(chunk_days)
+
+        log_close = np.log(last_close) + np.cumsum(returns)
+        close = np.exp(log_close)
+        open_prices = np.concatenate(([last_close], close[:-1]))
+        high = np.maximum(open_prices, close) * np.exp(range_volatility * np.abs(rng.standard_normal(num_bars)))
+        low = np.minimum(open_prices, close) * np.exp(-range_volatility * np.abs(rng.standard_normal(num_bars)))
+        last_close = close[-1]
+
+        days = np.busday_offset(first_day, np.arange(first, first + chunk_days), roll="forward")
+        minutes = np.arange(OPEN_MINUTE, OPEN_MINUTE + MINUTES_PER_DAY)
+        times = (days.astype("datetime64[m]")[:, None] + minutes[None, :]).reshape(-1)
+
+        yield {"Time": times, "Open": open_prices, "High": high, "Low": low, "Close": close}
+
+
+# class that will hold minute bars on disk partitioned by ticker and month so that any span of the history can be
+# read a partition at a time
+# each partition is <directory>/<ticker>/<YYYY-MM>.npz holding the MINUTE_COLUMNS of the month's bars in time order
+class MinuteBarStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    # method that will return the path of a ticker's partition for a month
+    def partition_path(self, ticker, month):
+        return os.path.join(self.directory, ticker, str(month) + ".npz")
+
+    # method that will return the months that have bars for a ticker in time order
+    def partitions(self, ticker):
+        ticker_directory = os.path.join(self.directory, ticker)
+        if not os.path.isdir(ticker_directory):
+            return []
+        return sorted(np.datetime64(name[:-4], "M") for name in os.listdir(ticker_directory) if name.endswith(".npz"))
+
+    # method that will return the tickers that have bars in the store
+    def tickers(self):
+        return sorted(name for name in os.listdir(self.directory) if self.partitions(name))
+
+    # method that will read the bars of a partition
+    def read_partition(self, ticker, month):
+        with np.load(self.partition_path(ticker, month)) as partition:
+            return {name: partition[name] for name in MINUTE_COLUMNS}
+
+    # method that will add a chunk of bars to the end of a ticker's bars, the bars must be later than the bars that
+    # are stored already, only the partitions of the months in the chunk are read and rewritten
+    def append(self, ticker, bars):
+        os.makedirs(os.path.join(self.directory, ticker), exist_ok=True)
+        months = bars["Time"].astype("datetime64[M]")
+        boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+        for begin, end in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [len(months)]))):
+            month = months[begin]
+            path = self.partition_path(ticker, month)
+            columns = {name: bars[name][begin:end] for name in MINUTE_COLUMNS}
+            if os.path.exists(path):
+                stored = self.read_partition(ticker, month)
+                if stored["Time"][-1] >= columns["Time"][0]:
+                    raise ValueError("the bars must be appended in time order")
+                columns = {name: np.concatenate((stored[name], columns[name])) for name in MINUTE_COLUMNS}
+            # write to a temporary file and then replace so that a partially written partition is never read
+            temp_path = path[:-4] + ".tmp.npz"
+            np.savez(temp_path, **columns)
+            os.replace(temp_path, path)
+
+    # method that will iterate over a ticker's bars from first to last (both datetime64 or strings, None for the
+    # start or end of the bars) a partition at a time, so only one month of bars is held in memory at once
+    def iter_chunks(self, ticker, first=None, last=None):
+        first = np.datetime64(first, "m") if first is not None else None
+        last = np.datetime64(last, "m") if last is not None else None
+        for month in self.partitions(ticker):
+            if first is not None and month < first.astype("datetime64[M]"):
+                continue
+            if last is not None and month > last.astype("datetime64[M]"):
+                break
+            bars = self.read_partition(ticker, month)
+            # only the first and last partitions can hold bars outside of the span
+            keep = np.ones(len(bars["Time"]), dtype=bool)
+            if first is not None:
+                keep &= bars["Time"] >= first
+            if last is not None:
+                keep &= bars["Time"] <= last
+            if not keep.all():
+                bars = {name: column[keep] for name, column in bars.items()}
+            if len(bars["Time"]):
+                yield bars
+
+    # method that will return the daily bars of a ticker in the same form as load_columns, aggregated a partition at
+    # a time so the minute bars are never all in memory
+    def load_daily_columns(self, ticker, first=None, last=None):
+        daily_chunks = list(iter_daily_bars(self.iter_chunks(ticker, first, last)))
+        if not daily_chunks:
+            return empty_daily_bars()
+        return {name: np.concatenate([chunk[name] for chunk in daily_chunks]) for name in ("Date",) + BAR_COLUMNS}
+
+
+# class that will aggregate chunks of minute bars into daily open, high, low and close bars as they stream in
+# a day can be split across chunks, so the bars of the last day of a chunk are held until a later day begins
+class DailyAggregator:
+    def __init__(self):
+        # the partial daily bar of the last day seen as a dict of Date and the price columns, None before any bars
+        self.pending = None
+
+    # method that will add a chunk of minute bars and return the daily bars of the days that are complete
+    def add(self, bars):
+        days = bars["Time"].astype("datetime64[D]")
+        if len(days) == 0:
+            return empty_daily_bars()
+        boundaries = np.concatenate(([0], np.flatnonzero(days[1:] != days[:-1]) + 1))
+        daily = {"Date": days[boundaries],
+                 "Open": bars["Open"][boundaries],
+                 "High": np.maximum.reduceat(bars["High"], boundaries),
+                 "Low": np.minimum.reduceat(bars["Low"], boundaries),
+                 "Close": bars["Close"][np.concatenate((boundaries[1:] - 1, [len(days) - 1]))]}
+
+        # the first day of the chunk continues the pending day if it is the same date
+        if self.pending is not None:
+            if self.pending["Date"] == daily["Date"][0]:
+                daily["Open"][0] = self.pending["Open"]
+                daily["High"][0] = max(daily["High"][0], self.pending["High"])
+                daily["Low"][0] = min(daily["Low"][0], self.pending["Low"])
+            else:
+                daily = {name: np.concatenate(([self.pending[name]], daily[name])) for name in daily}
+
+        # the last day may continue into the next chunk
+        self.pending = {name: column[-1] for name, column in daily.items()}
+        return {name: column[:-1] for name, column in daily.items()}
+
+    # method that will return the last day once there are no more bars
+    def finish(self):
+        if self.pending is None:
+            return empty_daily_bars()
+        daily = {name: np.array([value]) for name, value in self.pending.items()}
+        self.pending = None
+        return daily
+
+
+# method that will return daily bars holding no days
+def empty_daily_bars():
+    return {"Date": np.empty(0, dtype="datetime64[D]"), **{name: np.empty(0) for name in BAR_COLUMNS}}
+
+
+# method that will aggregate an iterable of chunks of minute bars into chunks of daily bars
+def iter_daily_bars(chunks):
+    aggregator = DailyAggregator()
+    for bars in chunks:
+        daily = aggregator.add(bars)
+        if len(daily["Date"]):
+            yield daily
+    daily = aggregator.finish()
+    if len(daily["Date"]):
+        yield daily
+
+
+# method that will stream chunks of minute bars through streaming strategies
+# the strategies must have been started with start_stream and keep their state from chunk to chunk, so feeding a
+# history in any chunks gives the same results as feeding it at once
+# the minute bars are aggregated into daily bars on the fly and each strategy sees one bar per day, as the state of
+# the strategies (the duration and the bars seen) is counted in days and a percent down limit is set from the open of
+# the day, so a percent down strategy's limit order at the open fills on any minute whose low reaches it
+def stream_strategies(strategies, chunks):
+    for bars in iter_daily_bars(chunks):
+        for strategy in strategies:
+            strategy.update_many(bars)
+    return strategies
@@ -1,8 +1,14 @@
+import math
 from heapq import heapify, heappush, heappop
-from strategy import TimeStrategy
+import numpy as np
+from resultAccumulator import ResultAccumulator, print_summary
+from priceWindow import as_price_history
+from trialRunner import accumulate_trials, execute_trials, seeded_start
 
 
-# class that will retain copies of the top_n strategies
+# class that will retain the top_n strategies
+# the heap holds (average return, order added, spec, summary) entries rather than the accumulators so the memory of a
+# search does not depend on the size of the accumulators (the quantile sketches) of the strategies that were kept
 class OptimalStrategyFinder:
     def __init__(self, top_n):
         # using a min heap for the top n best strategies
@@ -10,38 +16,131 @@ class OptimalStrategyFinder:
         heapify(heap)
         self.best_strategies = heap
         self.num_strategies = top_n
+        # the number of strategies that have been added, used to break ties between equal returns in the heap
+        self.num_added = 0
 
     # method that will either add an optimal strategy or discard if not optimal
-    def add_or_discard(self, accum_results):
+    # spec defaults to the spec of the strategy that the results were accumulated for
+    def add_or_discard(self, accum_results, spec=None):
         # discard strategy if accum_results.get_avg_total() <= self.best_strategies[0] and there are more
         # than num_strategies stored
+        if spec is None:
+            spec = accum_results.spec
+        self.add_or_discard_score(accum_results.get_avg_total(), spec, accum_results.summary)
 
+    # method that will either add a strategy with the given average return or discard it if not optimal
+    # make_summary is a function that returns the summary of the strategy's results, it is only called for the
+    # strategies that are added so that the summaries of discarded strategies are never made
+    def add_or_discard_score(self, score, spec, make_summary):
+        # heap entries are (average return, order added, spec, summary) so equal returns never compare the specs
+        self.num_added += 1
         # only a push if there are not yet the proper number of top strategies in the heap
         if len(self.best_strategies) < self.num_strategies:
-            heappush(self.best_strategies, (accum_results.get_avg_total(), accum_results))
+            heappush(self.best_strategies, (score, self.num_added, spec, make_summary()))
         # otherwise if greater than head of heap, remove the head and add
-        elif accum_results.get_avg_total() > self.best_strategies[0][0]:
+        elif score > self.best_strategies[0][0]:
             heappop(self.best_strategies)
-            heappush(self.best_strategies, (accum_results.get_avg_total(), accum_results))
+            heappush(self.best_strategies, (score, self.num_added, spec, make_summary()))
+
+    # method that will search for the optimal strategies by racing them over rounds of trials
+    # every round the remaining strategies are tested on the same new trials and each strategy is compared to the
+    # top_n-th best strategy on the trials that both were tested on, strategies are ranked and dropped by the same
+    # metric that add_or_discard ranks them by, the average return get_avg_total (the net return over the amount
+    # spent), and any strategy whose average return is below the top_n-th best by more than z standard errors of the
+    # paired difference is dropped, the next round has twice as many trials so the strategies that survive are given
+    # more trials, once only top_n strategies remain the rest of the trials are spent on them so every strategy that
+    # is added with add_or_discard was tested on all max_trials trials
+    # if a TrialPlan is given the trials are taken in order from the plan rather than drawn from the seed
+    # returns the number of trials that each strategy was tested on
+    def adaptive_search(self, strategies, sp_df, days, max_trials, seed, first_round=16, z=2.0, share_price=None,
+                        plan=None):
+        sp_hist = as_price_history(sp_df)
+        if share_price is None:
+            share_price = sp_hist.latest_close()
+        if plan is not None:
+            max_trials = min(max_trials, len(plan))
+
+        accumulated_results = [ResultAccumulator(strategy.name, strategy.spec()) for strategy in strategies]
+        # the net return and the amount spent on every trial for each of the remaining strategies
+        trial_returns = [[] for strategy in strategies]
+        remaining = list(range(len(strategies)))
+        trials_run = [0] * len(strategies)
+        next_trial = 0
+        round_trials = first_round
+        while next_trial < max_trials:
+            num_trials = min(round_trials, max_trials - next_trial)
+            # the trials are seeded by their number so every strategy is measured on the same trials
+            if plan is not None:
+                starts = plan.starts[next_trial:next_trial + num_trials]
+            else:
+                starts = [seeded_start(sp_hist, days, seed, trial) for trial in range(next_trial, next_trial + num_trials)]
+            remaining_strategies = [strategies[j] for j in remaining]
+            results = execute_trials(remaining_strategies, sp_hist, days, starts, share_price)
+            for k, accum in enumerate(accumulate_trials(remaining_strategies, results)):
+                accumulated_results[remaining[k]].merge(accum)
+                trial_returns[remaining[k]].append(results[:, k, [3, 1]])
+                trials_run[remaining[k]] += num_trials
+            next_trial += num_trials
+            round_trials *= 2
+
+            if len(remaining) > self.num_strategies and next_trial >= 2:
+                remaining = self.race_round(remaining, accumulated_results, trial_returns, z)
+
+        for j in remaining:
+            self.add_or_discard(accumulated_results[j])
+
+        return trials_run
+
+    # method that will return the remaining strategies that are not significantly worse than the top_n-th best
+    # the average return of a strategy is a ratio of sums, so the standard error of the difference of two average
+    # returns is found from the per trial terms (net return - average return * amount spent) / average amount spent
+    # whose mean is the difference to first order, these are exactly the differences in percentage return when every
+    # trial spends the same amount
+    def race_round(self, remaining, accumulated_results, trial_returns, z):
+        ranked = sorted(remaining, key=lambda j: accumulated_results[j].get_avg_total(), reverse=True)
+
+        def linearized(j):
+            net_returns, spent = np.concatenate(trial_returns[j]).T
+            return (net_returns - accumulated_results[j].get_avg_total() * spent) / spent.mean()
+
+        cutoff = ranked[self.num_strategies - 1]
+        cutoff_terms = linearized(cutoff)
+        survivors = ranked[:self.num_strategies]
+        for j in ranked[self.num_strategies:]:
+            difference = linearized(j) - cutoff_terms
+            upper_bound = (accumulated_results[j].get_avg_total() - accumulated_results[cutoff].get_avg_total() +
+                           z * difference.std(ddof=1) / math.sqrt(len(difference)))
+            if upper_bound >= 0:
+                survivors.append(j)
+            else:
+                trial_returns[j] = None
+        return sorted(survivors)
 
     # get the optimal strategies
+    # returns a list of (average return, spec, summary) tuples from the greatest to the least return
     def get_strategies(self):
-        return self.best_strategies
+        return [(avg_total, spec, summary) for avg_total, num_added, spec, summary in sorted(self.best_strategies,
+                                                                                         reverse=True)]
+
+    # method that will return the specs of the optimal strategies from the greatest to the least return
+    def get_specs(self):
+        return [spec for avg_total, spec, summary in self.get_strategies()]
 
     # method that will print the optimal strategies from least to greatest return
     def print_optimal(self):
-        print(self.best_strategies)
+        print([(avg_total, summary["name"]) for avg_total, spec, summary in self.get_strategies()])
         while len(self.best_strategies) != 0:
-            to_print = heappop(self.best_strategies)[1]
-            to_print.print_strategy_results()
+            print_summary(heappop(self.best_strategies)[3])
 
-    # method that will return a list with the optimal time strategies
+    # method that will return a list with the optimal time strategies, made from their specs with the duration,
+    # amount to spend and purchase time replaced
     def get_optimal_list_time(self, duration, total_to_spend, time):
         optimal_list = []
         while len(self.best_strategies) != 0:
-            time_string = heappop(self.best_strategies)[1].name
-            interval = float(time_string[6:9])
-            temp_strat = TimeStrategy(time_string, interval, duration, total_to_spend, time)
-            optimal_list.append(temp_strat)
+            avg_total, num_added, spec, summary = heappop(self.best_strategies)
+            if spec is None:
+                raise ValueError(summary["name"] + " was added without a spec")
+            spec = spec.replace(duration=duration, to_spend=total_to_spend, time=time)
+            optimal_list.append(spec.make_strategy(summary["name"]))
 
         return optimal_list
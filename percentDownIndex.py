@@ -0,0 +1,52 @@
+import numpy as np
+
+
+# class that will index the days on which the low is down a specified percentage from the open
+# the index is built once for the whole price history and is shared by every DatePercentStrategy instance and trial
+# so that any number of percentage thresholds can be looked up without recomputing Low / Open
+class PercentDownIndex:
+    def __init__(self, open_prices, low_prices):
+        # the intraday drawdown ratio for every day in the history
+        self.ratios = np.asarray(low_prices, dtype=np.float64) / np.asarray(open_prices, dtype=np.float64)
+        # the rows of the history ordered by their ratio, the days that satisfy any threshold are a prefix of these
+        self.order = np.argsort(self.ratios, kind="stable")
+        self.sorted_ratios = self.ratios[self.order]
+        # dicts from the threshold to the sorted qualifying rows and to the prefix counts of qualifying rows
+        self.threshold_days = {}
+        self.threshold_prefix_counts = {}
+
+    # method that will return the ratio that a day's Low / Open must be under to be down the specified percentage
+    @staticmethod
+    def threshold(percent_down):
+        return 1 - percent_down / 100
+
+    # method that will return the number of days in the whole history that are down the specified percentage
+    def count_total(self, percent_down):
+        return int(np.searchsorted(self.sorted_ratios, self.threshold(percent_down), side="left"))
+
+    # method that will return the sorted rows of the history that are down the specified percentage
+    def days(self, percent_down):
+        threshold = self.threshold(percent_down)
+        if threshold not in self.threshold_days:
+            self.threshold_days[threshold] = np.sort(self.order[:self.count_total(percent_down)])
+        return self.threshold_days[threshold]
+
+    # method that will return the prefix counts of the days that are down the specified percentage
+    # ie prefix_counts[i] is the number of qualifying days in the rows [0, i)
+    def prefix_counts(self, percent_down):
+        threshold = self.threshold(percent_down)
+        if threshold not in self.threshold_prefix_counts:
+            prefix_counts = np.zeros(len(self.ratios) + 1, dtype=np.int64)
+            np.cumsum(self.ratios < threshold, out=prefix_counts[1:])
+            self.threshold_prefix_counts[threshold] = prefix_counts
+        return self.threshold_prefix_counts[threshold]
+
+    # method that will return the number of days in the rows [begin, end) that are down the specified percentage
+    def count(self, percent_down, begin, end):
+        prefix_counts = self.prefix_counts(percent_down)
+        return int(prefix_counts[end] - prefix_counts[begin])
+
+    # method that will return the sorted rows in [begin, end) that are down the specified percentage
+    def days_between(self, percent_down, begin, end):
+        days = self.days(percent_down)
+        return days[np.searchsorted(days, begin, side="left"):np.searchsorted(days, end, side="left")]
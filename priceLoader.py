@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import numpy as np
+
+# the columns of a price table in the order that they are selected
+COLUMN_NAMES = ("Date", "Open", "High", "Low", "Close")
+
+# bump when the layout of the cache changes so that old caches are rebuilt
+CACHE_VERSION = 1
+
+
+# method that will return the path of the columnar cache for a table, the cache is kept next to the db
+def cache_path(db_path, table, ticker=None):
+    if ticker is None:
+        return db_path + "." + table + ".npz"
+    return db_path + "." + table + "." + ticker + ".npz"
+
+
+# method that will return the signature of the db file, the signature changes whenever the db is written to
+# so a cache that was made with a different signature is stale
+def db_signature(db_path):
+    stat = os.stat(db_path)
+    return np.array([CACHE_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+# method that will read a table of prices from the db into typed arrays in order of date
+# if a ticker is given only the rows for that ticker are read from a table keyed by (ticker, date)
+def read_columns(db_path, table, ticker=None):
+    con = sqlite3.connect(db_path)
+    cur = con.cursor()
+    # fetch all of the rows at once rather than row by row
+    if ticker is None:
+        rows = cur.execute('SELECT date, open, high, low, close FROM ' + table + ' ORDER BY date').fetchall()
+    else:
+        rows = cur.execute('SELECT date, open, high, low, close FROM ' + table + ' WHERE ticker = ? ORDER BY date',
+                           (ticker,)).fetchall()
+    con.close()
+
+    columns = {}
+    if rows:
+        fields = list(zip(*rows))
+    else:
+        fields = [()] * len(COLUMN_NAMES)
+    columns["Date"] = np.array(fields[0], dtype="datetime64[D]")
+    for name, field in zip(COLUMN_NAMES[1:], fields[1:]):
+        columns[name] = np.array(field, dtype=np.float64)
+    return columns
+
+
+# method that will load a table of prices as a dict from the column name to a typed array in order of date
+# the arrays are cached next to the db and the cache is used until the db changes
+def load_columns(db_path='sp.db', table='sp', use_cache=True, ticker=None):
+    if not use_cache:
+        return read_columns(db_path, table, ticker)
+
+    path = cache_path(db_path, table, ticker)
+    signature = db_signature(db_path)
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            if np.array_equal(cached["signature"], signature):
+                return {name: cached[name] for name in COLUMN_NAMES}
+
+    columns = read_columns(db_path, table, ticker)
+    # write to a temporary file and then replace so that a partially written cache is never read
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as cache_file:
+        np.savez(cache_file, signature=signature, **columns)
+    os.replace(temp_path, path)
+    return columns
+
+
+# method that will load the price history of a ticker from the multi ticker price store in the db
+# if the store has no prices for the ticker they are taken from the legacy sp table when it holds the ticker's
+# prices, otherwise they are fetched from the source (yfinance by default)
+def load_price_history(ticker="VOO", db_path='sp.db', source=None, legacy_table="sp"):
+    # imported here as priceStore imports this module
+    from priceStore import PriceStore, YFinancePriceSource
+    from priceWindow import PriceHistory
+
+    store = PriceStore(db_path)
+    if store.last_date(ticker) is None:
+        con = sqlite3.connect(db_path)
+        has_legacy = con.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                 (legacy_table,)).fetchone()[0]
+        con.close()
+        if has_legacy and ticker == "VOO":
+            store.import_legacy_table(ticker, legacy_table)
+        else:
+            store.refresh(ticker, source if source is not None else YFinancePriceSource())
+
+    return PriceHistory.from_columns(store.load_columns(ticker))
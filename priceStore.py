@@ -0,0 +1,115 @@
+from abc import ABC, abstractmethod
+import csv
+import os
+import sqlite3
+from datetime import date, timedelta
+from priceLoader import load_columns
+
+
+# class that will be a source of daily prices that a PriceStore can refresh from
+# fetch returns the (date, open, high, low, close) rows for a ticker after the date since (all rows if since is None)
+class PriceSource(ABC):
+    @abstractmethod
+    def fetch(self, ticker, since):
+        pass
+
+
+# class that will read daily prices from local csv files, one file per ticker named <ticker>.csv with the columns
+# Date, Open, High, Low, Close, this works offline and is used for fixtures
+class CsvPriceSource(PriceSource):
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ticker, since):
+        rows = []
+        with open(os.path.join(self.directory, ticker + ".csv"), newline="") as csv_file:
+            for record in csv.DictReader(csv_file):
+                day = record["Date"][0:10]
+                if since is None or day > since:
+                    rows.append((day, float(record["Open"]), float(record["High"]), float(record["Low"]),
+                                 float(record["Close"])))
+        return rows
+
+
+# class that will download daily prices using the yfinance API
+# note that yfinance is only imported when prices are downloaded
+class YFinancePriceSource(PriceSource):
+    def fetch(self, ticker, since):
+        import yfinance as yf
+
+        if since is None:
+            history = yf.Ticker(ticker).history(period="max")
+        else:
+            start = date.fromisoformat(since) + timedelta(days=1)
+            history = yf.Ticker(ticker).history(start=start.isoformat())
+
+        rows = []
+        for i in range(len(history.index)):
+            day = str(history.index[i])[0:10]
+            if since is None or day > since:
+                rows.append((day, float(history["Open"].iloc[i]), float(history["High"].iloc[i]),
+                             float(history["Low"].iloc[i]), float(history["Close"].iloc[i])))
+        return rows
+
+
+# class that will store the daily prices of any number of tickers in a table keyed by (ticker, date)
+# the primary key is the index, so the last date and the latest close of a ticker are index lookups
+class PriceStore:
+    def __init__(self, db_path='sp.db'):
+        self.db_path = db_path
+        con = sqlite3.connect(self.db_path)
+        con.execute('''CREATE TABLE IF NOT EXISTS prices
+                       (ticker text NOT NULL, date text NOT NULL, open real, high real, low real, close real,
+                        PRIMARY KEY (ticker, date)) WITHOUT ROWID''')
+        con.commit()
+        con.close()
+
+    # method that will copy the rows of the single ticker sp table made by make_sp_sqlite into the store
+    def import_legacy_table(self, ticker="VOO", table="sp"):
+        con = sqlite3.connect(self.db_path)
+        cur = con.execute('INSERT OR IGNORE INTO prices SELECT ?, date, open, high, low, close FROM ' + table,
+                          (ticker,))
+        added = cur.rowcount
+        con.commit()
+        con.close()
+        return added
+
+    # method that will return the tickers that have prices in the store
+    def tickers(self):
+        con = sqlite3.connect(self.db_path)
+        tickers = [row[0] for row in con.execute('SELECT DISTINCT ticker FROM prices ORDER BY ticker')]
+        con.close()
+        return tickers
+
+    # method that will return the last date that is stored for a ticker or None if the ticker has no prices
+    def last_date(self, ticker):
+        con = sqlite3.connect(self.db_path)
+        last = con.execute('SELECT max(date) FROM prices WHERE ticker = ?', (ticker,)).fetchone()[0]
+        con.close()
+        return last
+
+    # method that will return the close on the last date that is stored for a ticker
+    # this is the price that the shares of a strategy are valued at
+    def latest_close(self, ticker):
+        con = sqlite3.connect(self.db_path)
+        row = con.execute('SELECT close FROM prices WHERE ticker = ? ORDER BY date DESC LIMIT 1', (ticker,)).fetchone()
+        con.close()
+        if row is None:
+            raise KeyError("no prices are stored for " + ticker)
+        return row[0]
+
+    # method that will append only the dates after the last stored date of a ticker from the source
+    # returns the number of rows that were added
+    def refresh(self, ticker, source):
+        rows = source.fetch(ticker, self.last_date(ticker))
+        con = sqlite3.connect(self.db_path)
+        cur = con.executemany('INSERT OR IGNORE INTO prices VALUES(?,?,?,?,?,?);',
+                              [(ticker,) + tuple(row) for row in rows])
+        added = cur.rowcount
+        con.commit()
+        con.close()
+        return added
+
+    # method that will load the prices of a ticker as typed columns in order of date
+    def load_columns(self, ticker, use_cache=True):
+        return load_columns(self.db_path, "prices", use_cache, ticker)
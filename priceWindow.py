@@ -0,0 +1,124 @@
+import hashlib
+import weakref
+import numpy as np
+from percentDownIndex import PercentDownIndex
+
+
+# the price columns that are held by a PriceHistory
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+
+
+# class that will hold the whole price history as NumPy arrays so that trial windows can be handed out as views
+# rather than copies of the dataframe
+class PriceHistory:
+    def __init__(self, columns, dates=None):
+        # dict from the column name to the array of the column for the whole history
+        self.columns = {}
+        for name, column in columns.items():
+            self.columns[name] = np.asarray(column, dtype=np.float64)
+        self.dates = dates
+        self.length = len(self.columns["Open"])
+        self.down_index = None
+        self.data_digest = None
+
+    # the index of the days that are down a percentage from the open, shared by all windows of this history
+    # it is built the first time it is used so that a history that is only used by time strategies never sorts the days
+    @property
+    def percent_index(self):
+        if self.down_index is None:
+            self.down_index = PercentDownIndex(self.columns["Open"], self.columns["Low"])
+        return self.down_index
+
+    # method that will create a price history from the df that is returned by load_db
+    @classmethod
+    def from_df(cls, sp_df):
+        columns = {}
+        for name in PRICE_COLUMNS:
+            columns[name] = sp_df[name].to_numpy()
+        return cls(columns, sp_df["Date"].to_numpy())
+
+    # method that will create a price history from the columns that are returned by load_columns
+    @classmethod
+    def from_columns(cls, columns):
+        return cls({name: columns[name] for name in PRICE_COLUMNS}, columns["Date"])
+
+    # method that will return the array of a column for the whole history
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __len__(self):
+        return self.length
+
+    # method that will return a hash of the prices, any change to the prices changes the digest
+    def digest(self):
+        if self.data_digest is None:
+            hasher = hashlib.sha256()
+            for name in PRICE_COLUMNS:
+                hasher.update(name.encode())
+                hasher.update(np.ascontiguousarray(self.columns[name]).tobytes())
+            self.data_digest = hasher.hexdigest()
+        return self.data_digest
+
+    # method that will return the close on the last day of the history
+    def latest_close(self):
+        return float(self.columns["Close"][-1])
+
+    # method that will return the window of the given number of days that begins on the row start
+    def window(self, start, days):
+        return PriceWindow(self, start, days)
+
+
+# the last df that was converted by as_price_history and its price history, the df is held by a weak reference so
+# that the cache does not keep it alive
+converted_df = (None, None)
+
+
+# method that will return a price history for either a price history or the df that is returned by load_db
+# the price history of the last df is kept so that passing the same df on every trial (eg to make_test_df) does not
+# copy its columns each time, note that a df that is changed in place after it was converted is not converted again
+def as_price_history(prices):
+    global converted_df
+    if isinstance(prices, PriceHistory):
+        return prices
+    df_ref, sp_hist = converted_df
+    if df_ref is not None and df_ref() is prices:
+        return sp_hist
+    sp_hist = PriceHistory.from_df(prices)
+    converted_df = (weakref.ref(prices), sp_hist)
+    return sp_hist
+
+
+# class that will represent the rows of a single trial, the window does not copy any rows and is indexed
+# from 0 at the start of the trial
+class PriceWindow:
+    def __init__(self, history, start, days):
+        self.history = history
+        # the row of the history that corresponds to row 0 of the window
+        self.start = start
+        self.days = days
+
+    # method that will return a view of a column for the days in the window
+    def __getitem__(self, column):
+        return self.history.columns[column][self.start:self.start + self.days]
+
+    def __len__(self):
+        return self.days
+
+    # method that will return a view of a column from the start of the window to the end of the history
+    def tail(self, column):
+        return self.history.columns[column][self.start:]
+
+    # method that will return the number of rows from the start of the window to the end of the history
+    def tail_length(self):
+        return self.history.length - self.start
+
+    # method that will return the rows of the window within the first end days that are down the specified percentage
+    # note that the rows are relative to the start of the window
+    def down_days(self, percent_down, end):
+        end = self.start + min(end, self.days)
+        return self.history.percent_index.days_between(percent_down, self.start, end) - self.start
+
+    # method that will return the number of days from the start of the window to the end of the history that are down
+    # the specified percentage
+    def tail_down_count(self, percent_down):
+        return self.history.percent_index.count(percent_down, self.start, self.history.length)
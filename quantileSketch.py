@@ -0,0 +1,102 @@
+import math
+import numpy as np
+
+
+# class that will estimate the quantiles of a stream of values in bounded memory
+# values are counted in logarithmically sized buckets so every quantile is estimated within relative_accuracy of the
+# true value, and two sketches with the same accuracy are merged by adding their bucket counts
+class QuantileSketch:
+    # values closer to 0 than this are counted as 0
+    MIN_INDEXABLE = 1e-9
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        # dicts from the bucket key to the number of values in the bucket for the positive and negative values
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    # method that will return the key of the bucket that holds a positive value
+    def key(self, value):
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    # method that will return the value that represents the bucket with the given key
+    def value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    # method that will add a value to the sketch
+    def add(self, value, count=1):
+        if value > self.MIN_INDEXABLE:
+            key = self.key(value)
+            self.positive[key] = self.positive.get(key, 0) + count
+            self.collapse(self.positive)
+        elif value < -self.MIN_INDEXABLE:
+            key = self.key(-value)
+            self.negative[key] = self.negative.get(key, 0) + count
+            self.collapse(self.negative)
+        else:
+            self.zero_count += count
+        self.count += count
+
+    # method that will add every value of an array to the sketch
+    def add_array(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        for sign, buckets in ((1, self.positive), (-1, self.negative)):
+            magnitudes = values[sign * values > self.MIN_INDEXABLE] * sign
+            keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                buckets[key] = buckets.get(key, 0) + count
+            self.collapse(buckets)
+        self.zero_count += int(np.count_nonzero(np.abs(values) <= self.MIN_INDEXABLE))
+        self.count += len(values)
+
+    # method that will bound the number of buckets by folding the buckets nearest 0 together
+    # the values nearest 0 lose accuracy first as they matter least to the returns
+    def collapse(self, buckets):
+        while len(buckets) > self.max_buckets:
+            smallest = sorted(buckets)[:2]
+            buckets[smallest[1]] += buckets.pop(smallest[0])
+
+    # method that will add the values counted by another sketch to this sketch
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("only sketches with the same relative accuracy can be merged")
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.collapse(self.positive)
+        self.collapse(self.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    # method that will return the estimated value at the quantile q where 0 <= q <= 1
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+
+        # walk the buckets from the most negative value to the most positive value
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self.value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self.value(key)
+        return self.value(max(self.positive))
+
+    def clear(self):
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
@@ -1,14 +1,28 @@
+import math
+import numpy as np
+from quantileSketch import QuantileSketch
+
+
 # class that will be used to accumulate the results across random start dates
 # for different strategies
 class ResultAccumulator:
-    def __init__(self, name):
+    def __init__(self, name, spec=None):
         self.name = name
+        # the StrategySpec of the strategy whose results are accumulated, None if the strategy has no spec
+        self.spec = spec
         self.total_trades = 0.0
         self.total_spent = 0.0
         self.final_total = 0.0
         self.net_return_total = 0.0
         self.return_percentage_total = 0.0
         self.results_accumulated = 0
+        # the running mean and sum of squared differences from the mean of the percentage return (Welford)
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+        self.return_min = math.inf
+        self.return_max = -math.inf
+        # the distribution of the percentage return for the percentiles
+        self.return_sketch = QuantileSketch()
 
     # method that will accumulate results
     def accum_results(self, results):
@@ -17,6 +31,54 @@ class ResultAccumulator:
         self.total_spent += results[1]
         self.final_total += results[2]
         self.net_return_total += results[3]
+        self.return_percentage_total += results[4]
+
+        # update the online statistics of the percentage return
+        delta = results[4] - self.return_mean
+        self.return_mean += delta / self.results_accumulated
+        self.return_m2 += delta * (results[4] - self.return_mean)
+        self.return_min = min(self.return_min, results[4])
+        self.return_max = max(self.return_max, results[4])
+        self.return_sketch.add(results[4])
+
+    # method that will accumulate the results of many trials at once from an array of shape (trials, 5)
+    # note that the totals are summed by NumPy so they can differ from repeated calls to accum_results by rounding
+    def accum_results_array(self, results):
+        results = np.asarray(results, dtype=np.float64)
+        if len(results) == 0:
+            return
+        batch = ResultAccumulator(self.name)
+        batch.results_accumulated = len(results)
+        batch.total_trades, batch.total_spent, batch.final_total, batch.net_return_total, \
+            batch.return_percentage_total = results.sum(axis=0).tolist()
+        returns = results[:, 4]
+        batch.return_mean = float(returns.mean())
+        batch.return_m2 = float(np.sum((returns - batch.return_mean) ** 2))
+        batch.return_min = float(returns.min())
+        batch.return_max = float(returns.max())
+        batch.return_sketch.add_array(returns)
+        self.merge(batch)
+
+    # method that will add the results accumulated by another accumulator to this accumulator
+    # used to combine the accumulators of separate chunks of trials
+    def merge(self, other):
+        if other.results_accumulated == 0:
+            return
+        total = self.results_accumulated + other.results_accumulated
+        # combine the means and the sums of squared differences of the two accumulators (Chan et al.)
+        delta = other.return_mean - self.return_mean
+        self.return_mean += delta * other.results_accumulated / total
+        self.return_m2 += other.return_m2 + delta * delta * self.results_accumulated * other.results_accumulated / total
+        self.return_min = min(self.return_min, other.return_min)
+        self.return_max = max(self.return_max, other.return_max)
+        self.return_sketch.merge(other.return_sketch)
+
+        self.results_accumulated = total
+        self.total_trades += other.total_trades
+        self.total_spent += other.total_spent
+        self.final_total += other.final_total
+        self.net_return_total += other.net_return_total
+        self.return_percentage_total += other.return_percentage_total
 
     # method that will return the average over accumulated totals for a metric
     def get_average(self, metric):
@@ -26,14 +88,41 @@ class ResultAccumulator:
     def get_avg_total(self):
         return self.net_return_total/self.total_spent
 
+    # method that will return the sample standard deviation of the percentage return across trials
+    def get_return_std(self):
+        if self.results_accumulated < 2:
+            return 0.0
+        return math.sqrt(self.return_m2 / (self.results_accumulated - 1))
+
+    # method that will return the confidence interval of the mean percentage return across trials
+    # z is the number of standard errors on either side of the mean, 1.96 for a 95% interval
+    def get_return_confidence_interval(self, z=1.96):
+        half_width = z * self.get_return_std() / math.sqrt(max(self.results_accumulated, 1))
+        return self.return_mean - half_width, self.return_mean + half_width
+
+    # method that will return the estimated percentage return at the percentile p where 0 <= p <= 100
+    def get_return_percentile(self, p):
+        return self.return_sketch.quantile(p / 100)
+
     # method that will print the accumulated results
     def print_strategy_results(self):
-        print("\nPerformance Summary for " + self.name)
-        print("Average Number of trades: " + str(self.get_average(self.total_trades)))
-        print("Average Total spent: $" + str(self.get_average(self.total_spent)))
-        print("Average Final total: $" + str(self.get_average(self.final_total)))
-        print("Average Total net return: $" + str(self.get_average(self.net_return_total)))
-        print("Average Percentage return: " + str(self.net_return_total/self.total_spent * 100) + '%')
+        print_summary(self.summary())
+
+    # method that will return the accumulated results as a dict of plain numbers that can be written as json
+    # the averages are per trial and the returns are fractions ie 0.1 is a 10% return
+    def summary(self):
+        low, high = self.get_return_confidence_interval()
+        return {"name": self.name, "spec": self.spec.to_dict() if self.spec is not None else None,
+                "trials": self.results_accumulated,
+                "average_trades": self.get_average(self.total_trades),
+                "average_spent": self.get_average(self.total_spent),
+                "average_final_total": self.get_average(self.final_total),
+                "average_net_return": self.get_average(self.net_return_total),
+                "return": self.get_avg_total(), "return_std": self.get_return_std(),
+                "return_ci_low": low, "return_ci_high": high,
+                "return_p5": self.get_return_percentile(5), "return_p50": self.get_return_percentile(50),
+                "return_p95": self.get_return_percentile(95),
+                "return_min": self.return_min, "return_max": self.return_max}
 
     def clear(self):
         self.total_trades = 0.0
@@ -41,4 +130,29 @@ class ResultAccumulator:
         self.final_total = 0.0
         self.net_return_total = 0.0
         self.return_percentage_total = 0.0
-        self.results_accumulated = 0
\ No newline at end of file
+        self.results_accumulated = 0
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+        self.return_min = math.inf
+        self.return_max = -math.inf
+        self.return_sketch.clear()
+
+
+# method that will print the summary of accumulated results returned by ResultAccumulator.summary
+def print_summary(summary):
+    print("\nPerformance Summary for " + summary["name"])
+    print("Average Number of trades: " + str(summary["average_trades"]))
+    print("Average Total spent: $" + str(summary["average_spent"]))
+    print("Average Final total: $" + str(summary["average_final_total"]))
+    print("Average Total net return: $" + str(summary["average_net_return"]))
+    print("Average Percentage return: " + str(summary["return"] * 100) + '%')
+    print("Percentage return std: " + str(summary["return_std"] * 100) + '%')
+    print("Percentage return 95% CI of the mean: " + str(summary["return_ci_low"] * 100) + '% to ' +
+          str(summary["return_ci_high"] * 100) + '%')
+    # the summaries made from prefix sums by walkForward.py have no percentiles or extremes
+    if summary["return_p50"] is not None:
+        print("Percentage return 5th/50th/95th percentiles: " + str(summary["return_p5"] * 100) + '% / ' +
+              str(summary["return_p50"] * 100) + '% / ' + str(summary["return_p95"] * 100) + '%')
+    if summary["return_min"] is not None:
+        print("Percentage return min/max: " + str(summary["return_min"] * 100) + '% / ' +
+              str(summary["return_max"] * 100) + '%')
@@ -0,0 +1,100 @@
+import hashlib
+import numbers
+import os
+import numpy as np
+
+# the default largest total size of the cached results in bytes
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+# method that will return a parameter of a strategy in the form it is hashed in, numbers are made floats so that equal
+# parameters such as 127 and 127.0 share an entry as they do in EvaluationCache
+def normalize_param(value):
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+# class that will keep the results of every trial of a plan for evaluated strategies on disk so that they are reused
+# across runs, every entry is a .npy file named by a hash of the strategy's params, the prices, the plan and the price
+# the shares are valued at, so when new rows are added to the prices the digest of the prices changes and the entries
+# made with the old prices are never read again, the least recently used entries are removed once the cache is larger
+# than max_bytes
+# this has the same interface as EvaluationCache and can be passed to evaluate_plan and test_strategies_on_plan
+class ResultCache:
+    def __init__(self, directory=".result_cache", max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        # the total size of the entries, found by scanning the directory when it is first needed
+        self.total_bytes = None
+
+    # method that will return the key of a strategy's results or None if the strategy cannot be cached
+    @staticmethod
+    def key(strategy, sp_hist, plan, share_price):
+        params = strategy.params()
+        if params is None:
+            return None
+        params = tuple(normalize_param(value) for value in params)
+        return hashlib.sha256(repr((params, sp_hist.digest(), plan.digest(), float(share_price))).encode()).hexdigest()
+
+    # method that will return the path of the entry for a key
+    def path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    # method that will return the cached results for a key or None if they are not cached
+    def get(self, key):
+        path = self.path(key)
+        try:
+            results = np.load(path)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        # mark the entry as recently used
+        os.utime(path)
+        return results
+
+    # method that will add results to the cache and evict the least recently used entries if the cache is too large
+    def put(self, key, results):
+        path = self.path(key)
+        # an entry that is replaced no longer counts towards the total size
+        old_bytes = os.path.getsize(path) if os.path.exists(path) else 0
+        # write to a temporary file and then replace so that a partially written entry is never read
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as entry_file:
+            np.save(entry_file, results)
+        os.replace(temp_path, path)
+
+        if self.total_bytes is None:
+            self.evict()
+        else:
+            self.total_bytes += os.path.getsize(path) - old_bytes
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    # method that will remove the least recently used entries until the cache is no larger than max_bytes
+    def evict(self):
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(path)
+            total_bytes -= size
+        self.total_bytes = total_bytes
+
+    # method that will remove every entry from the cache
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy"):
+                os.remove(entry.path)
+        self.total_bytes = 0
+
+    def __len__(self):
+        return sum(1 for entry in os.scandir(self.directory) if entry.name.endswith(".npy"))
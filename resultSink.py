@@ -0,0 +1,203 @@
+import json
+import os
+import numpy as np
+from batchEngine import RESULT_FIELDS
+from resultAccumulator import ResultAccumulator
+from strategySpec import spec_from_dict
+
+# the version of the layout of a result directory, bumped whenever the layout changes
+SINK_VERSION = 2
+
+
+# class that will write the results of every trial of a study to a directory in a raw columnar layout that can be
+# memory mapped by ResultReader
+# the directory holds manifest.json, start.bin with the row of the price history that each trial began on,
+# start_date.bin with the date of that row (as days since 1970-01-01) if the history has dates, and a <field>.bin for
+# each of RESULT_FIELDS holding the float64 results of the field
+# the results are appended in chunks as the trials are run so the study never has to fit in memory, each chunk of a
+# field file holds a block of the chunk's trials for each strategy in turn (a (strategies, trials) matrix in row major
+# order), so the values of a strategy are contiguous within every chunk and reading one strategy only reads its own
+# blocks, the manifest lists the number of trials of every chunk and is rewritten after every chunk so the trials
+# written before an interrupted run can still be read
+class ResultSink:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = None
+        self.files = {}
+
+    # method that will write the manifest and open the column files on the first write of a study
+    def begin(self, strategies, has_dates):
+        self.manifest = {"version": SINK_VERSION, "trials": 0, "chunks": [], "fields": list(RESULT_FIELDS),
+                         "has_dates": has_dates,
+                         "strategies": [{"name": strategy.name,
+                                         "spec": strategy.spec().to_dict() if strategy.spec() is not None else None}
+                                        for strategy in strategies]}
+        names = ["start"] + (["start_date"] if has_dates else []) + list(RESULT_FIELDS)
+        for name in names:
+            # any results of an earlier study in the directory are replaced
+            self.files[name] = open(os.path.join(self.directory, name + ".bin"), "wb")
+        self.write_manifest()
+
+    # method that will write the manifest, replacing the previous manifest so a partially written one is never read
+    def write_manifest(self):
+        temp_path = os.path.join(self.directory, "manifest.json.tmp")
+        with open(temp_path, "w") as manifest_file:
+            json.dump(self.manifest, manifest_file)
+        os.replace(temp_path, os.path.join(self.directory, "manifest.json"))
+
+    # method that will append a chunk of trials, results is an array of shape (len(starts), len(strategies), 5) as
+    # returned by execute_trials, the strategies must be the same on every write of a study
+    def write(self, strategies, sp_hist, starts, results):
+        if self.manifest is None:
+            self.begin(strategies, sp_hist.dates is not None)
+        elif len(strategies) != len(self.manifest["strategies"]):
+            raise ValueError("every chunk of a study must have the results of the same strategies")
+
+        starts = np.asarray(starts, dtype=np.int64)
+        starts.tofile(self.files["start"])
+        if self.manifest["has_dates"]:
+            dates = np.asarray(sp_hist.dates)[starts].astype("datetime64[D]")
+            dates.view(np.int64).tofile(self.files["start_date"])
+        for k, field in enumerate(RESULT_FIELDS):
+            np.ascontiguousarray(results[:, :, k].T, dtype=np.float64).tofile(self.files[field])
+
+        for column_file in self.files.values():
+            column_file.flush()
+        self.manifest["trials"] += len(starts)
+        self.manifest["chunks"].append(len(starts))
+        self.write_manifest()
+
+    def close(self):
+        for column_file in self.files.values():
+            column_file.close()
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# class that will read the results written by ResultSink without loading them into memory
+# the files are memory mapped so only the pages of the trials and strategies that are selected are read
+class ResultReader:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json")) as manifest_file:
+            self.manifest = json.load(manifest_file)
+        if self.manifest["version"] != SINK_VERSION:
+            raise ValueError("the results in " + directory + " were written by an incompatible version")
+        self.num_trials = self.manifest["trials"]
+        self.names = [strategy["name"] for strategy in self.manifest["strategies"]]
+        self.specs = [spec_from_dict(strategy["spec"]) if strategy["spec"] is not None else None
+                      for strategy in self.manifest["strategies"]]
+        # the first trial of every chunk and the end of the last chunk
+        self.chunk_offsets = np.concatenate(([0], np.cumsum(self.manifest["chunks"], dtype=np.int64)))
+
+    # method that will memory map a file of the given length, the length is that of the trials that the manifest lists
+    # so any trials of a chunk that was being written when the manifest was last written are ignored
+    def map_file(self, name, dtype, length):
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.directory, name + ".bin"), dtype=dtype, mode="r", shape=(length,))
+
+    # method that will return the row of the price history that each trial began on
+    def starts(self):
+        return self.map_file("start", np.int64, self.num_trials)
+
+    # method that will return the date that each trial began on or None if the history had no dates
+    def start_dates(self):
+        if not self.manifest["has_dates"]:
+            return None
+        return self.map_file("start_date", np.int64, self.num_trials).view("datetime64[D]")
+
+    # method that will return the memory mapped file of a field of RESULT_FIELDS
+    def field_file(self, field):
+        return self.map_file(field, np.float64, self.num_trials * len(self.names))
+
+    # method that will return the blocks of a chunk of a field file as a (strategies, chunk trials) matrix
+    def chunk_blocks(self, field_file, chunk):
+        first, last = self.chunk_offsets[chunk], self.chunk_offsets[chunk + 1]
+        return field_file[first * len(self.names):last * len(self.names)].reshape(len(self.names), last - first)
+
+    # method that will return the values of a field for every trial of a strategy given by name, position or spec
+    # only the strategy's own block of each chunk is read
+    def column(self, field, strategy):
+        position = self.strategy_positions([strategy])[0]
+        field_file = self.field_file(field)
+        blocks = [self.chunk_blocks(field_file, chunk)[position] for chunk in range(len(self.manifest["chunks"]))]
+        return np.concatenate(blocks) if blocks else np.empty(0)
+
+    # method that will return the positions of the strategies given by name, position or spec (all if None)
+    def strategy_positions(self, strategies=None):
+        if strategies is None:
+            return list(range(len(self.names)))
+        positions = []
+        for strategy in strategies:
+            if isinstance(strategy, str):
+                positions.append(self.names.index(strategy))
+            elif isinstance(strategy, int):
+                positions.append(strategy)
+            else:
+                positions.append(self.specs.index(strategy))
+        return positions
+
+    # method that will return the mask of the trials in [first, last) that begin in the range of starts and dates
+    # the ranges include both ends and None leaves that end of the range open, dates are numpy datetime64 or
+    # strings such as "2015-01-31"
+    def trial_mask(self, first, last, first_start=None, last_start=None, first_date=None, last_date=None):
+        mask = np.ones(last - first, dtype=bool)
+        if first_start is not None or last_start is not None:
+            starts = self.starts()[first:last]
+            if first_start is not None:
+                mask &= starts >= first_start
+            if last_start is not None:
+                mask &= starts <= last_start
+        if first_date is not None or last_date is not None:
+            dates = self.start_dates()
+            if dates is None:
+                raise ValueError("the results in " + self.directory + " have no dates")
+            dates = dates[first:last]
+            if first_date is not None:
+                mask &= dates >= np.datetime64(first_date, "D")
+            if last_date is not None:
+                mask &= dates <= np.datetime64(last_date, "D")
+        return mask
+
+    # method that will iterate over the selected results a chunk of trials (as they were written) at a time
+    # yields (starts, results) where results is an array of shape (selected trials, selected strategies, 5)
+    def iter_chunks(self, strategies=None, first_start=None, last_start=None, first_date=None, last_date=None):
+        positions = self.strategy_positions(strategies)
+        field_files = [self.field_file(field) for field in RESULT_FIELDS]
+        all_starts = self.starts()
+        for chunk in range(len(self.manifest["chunks"])):
+            first, last = self.chunk_offsets[chunk], self.chunk_offsets[chunk + 1]
+            mask = self.trial_mask(first, last, first_start, last_start, first_date, last_date)
+            if not mask.any():
+                continue
+            results = np.empty((int(mask.sum()), len(positions), len(RESULT_FIELDS)))
+            for k, field_file in enumerate(field_files):
+                # only the blocks of the selected strategies are read
+                results[:, :, k] = self.chunk_blocks(field_file, chunk)[positions][:, mask].T
+            yield all_starts[first:last][mask], results
+
+    # method that will return the selected results as a single array of shape (trials, strategies, 5)
+    # note that this loads the selection into memory, use aggregate or iter_chunks for large selections
+    def select(self, strategies=None, first_start=None, last_start=None, first_date=None, last_date=None):
+        chunks = [results for starts, results in self.iter_chunks(strategies, first_start, last_start, first_date,
+                                                                   last_date)]
+        if not chunks:
+            return np.empty((0, len(self.strategy_positions(strategies)), len(RESULT_FIELDS)))
+        return np.concatenate(chunks)
+
+    # method that will accumulate the selected results a chunk of trials at a time
+    # returns a list with a result accumulator for each selected strategy
+    def aggregate(self, strategies=None, first_start=None, last_start=None, first_date=None, last_date=None):
+        positions = self.strategy_positions(strategies)
+        accumulated_results = [ResultAccumulator(self.names[j], self.specs[j]) for j in positions]
+        for starts, results in self.iter_chunks(strategies, first_start, last_start, first_date, last_date):
+            for k, accum in enumerate(accumulated_results):
+                accum.accum_results_array(results[:, k])
+        return accumulated_results
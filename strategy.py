@@ -1,4 +1,11 @@
 from abc import ABC, abstractmethod
+import json
+import os
+import numpy as np
+from strategySpec import TimeSpec
+
+# the price columns of a bar that a streaming strategy is updated with
+BAR_COLUMNS = ("Open", "High", "Low", "Close")
 
 
 # creating a robust interface for a strategy
@@ -11,6 +18,8 @@ class Strategy(ABC):
         self.num_shares = 0.0
         self.share_price = 0.0
         self.total_orders = 0
+        # the number of bars that the strategy has been updated with when streaming
+        self.bars_seen = 0
 
     # method that will compute the total price of all the shares that are currently held
     def current_total_price(self):
@@ -45,11 +54,67 @@ class Strategy(ABC):
         self.num_shares += num_dollars / stock_price
         self.total_orders = self.total_orders + 1
 
-    # method that will execute the given trading strategy on the dataframe that is passed in
+    # method that will execute the given trading strategy on the PriceWindow that is passed in
     @abstractmethod
     def execute_strategy(self, stock_df):
         pass
 
+    # method that will begin executing the strategy one bar at a time rather than on a whole PriceWindow
+    # subclasses compute the order amount here since it cannot depend on bars that have not been seen yet
+    # every strategy takes the same optional keywords so that a list of strategies can be started alike, days is the
+    # number of bars the trial will run for and num_trades the estimated number of trades of a limited funds strategy,
+    # each strategy ignores the keywords that it does not need
+    def start_stream(self, days=None, num_trades=None):
+        self.clear()
+
+    # method that will update the strategy with the next bar, a mapping from the column names to the prices of one day
+    # the purchases made are the same as execute_strategy makes on the same days and the shares are valued at the close
+    # so the running results are available from results_copy at any time
+    def update(self, bar):
+        self.purchase_on_bar(bar)
+        self.bars_seen += 1
+        self.update_share_price(bar["Close"])
+
+    # method that will update the strategy with every bar of a PriceWindow or a dict of columns in order
+    def update_many(self, bars):
+        columns = [np.asarray(bars[name]).tolist() for name in BAR_COLUMNS]
+        for prices in zip(*columns):
+            self.update(dict(zip(BAR_COLUMNS, prices)))
+
+    # method that will make the purchase, if any, that the strategy makes on the next bar
+    @abstractmethod
+    def purchase_on_bar(self, bar):
+        pass
+
+    # method that will write the state of a streaming strategy to a json file so that it can be resumed later
+    def save_state(self, path):
+        state = {key: value for key, value in vars(self).items() if key != "purchase_prices"}
+        # write to a temporary file and then replace so that a partially written checkpoint is never read
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_path, path)
+
+    # method that will restore the state of a streaming strategy from a file written by save_state
+    def load_state(self, path):
+        with open(path) as state_file:
+            state = json.load(state_file)
+        if state["name"] != self.name:
+            raise ValueError("the checkpoint is for " + state["name"] + " not " + self.name)
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    # method that will return a hashable tuple of the class and the parameters that determine the strategy's results
+    # used to cache the results of a strategy, None if the results of the strategy cannot be cached
+    def params(self):
+        return None
+
+    # method that will return the StrategySpec that describes the strategy or None if there is none
+    # note that subclasses of the strategies with specs return None unless they define their own spec, as the spec of
+    # the class they extend would not describe how they behave
+    def spec(self):
+        return None
+
     # method that will print the results for a strategy
     def print_strategy_results(self):
         print("\nPerformance Summary for " + self.name)
@@ -73,6 +138,7 @@ class Strategy(ABC):
         self.num_shares = 0.0
         self.share_price = 0.0
         self.total_orders = 0
+        self.bars_seen = 0
 
 
 # class that will be a strategy for trading based on specific time intervals for investment
@@ -88,33 +154,52 @@ class TimeStrategy(Strategy):
         # for the day every day
         self.time = time
         self.to_spend = total_to_spend
-        self.purchase_df = None
+        self.purchase_prices = None
         self.order_amount = None
 
     def execute_strategy(self, stock_df):
-        # generate the row identifiers to obtain the information for purchase
-        self.purchase_df = self.generate_purchase_ids(stock_df)
+        # generate the prices on the days that correspond to purchases for this strategy
+        self.purchase_prices = self.generate_purchase_ids(stock_df)
         self.purchase_from_purchase_df()
 
-    # return the row identifiers of the days that will correspond to stock purchases for this strategy
+    def params(self):
+        return type(self).__name__, self.interval, self.duration, self.to_spend, self.time
+
+    def spec(self):
+        if type(self) is not TimeStrategy:
+            return None
+        return TimeSpec(self.interval, self.duration, self.to_spend, self.time)
+
+    # return the prices on the days that will correspond to stock purchases for this strategy
     def generate_purchase_ids(self, stock_df):
-        temp = stock_df[stock_df.index < self.duration]
-        temp = temp[temp.index % self.interval == 0]
+        purchase_ids = np.arange(min(self.duration, len(stock_df)))
+        purchase_ids = purchase_ids[purchase_ids % self.interval == 0]
         # note that due to the manner in which order_amount is defined it will likely be the case
         # that the total number of dollars will not be fully allocated
-        self.order_amount = self.to_spend / len(temp.index)
-        # print(temp)
+        self.order_amount = self.to_spend / len(purchase_ids)
+        # print(purchase_ids)
 
-        return temp
+        return stock_df[self.time][purchase_ids]
 
     def purchase_from_purchase_df(self):
         # note that I do not perform checking to determine if the capital is available for this trade as the exact
         # amount to be traded for the duration has been computed
-        for price in self.purchase_df[self.time]:
+        for price in self.purchase_prices.tolist():
             self.buy_in_dollars(self.order_amount, price)
 
+    # method that will begin streaming, days is the number of bars the trial will run for if it is shorter than the
+    # duration so that the order amount is the same as execute_strategy computes on a window of that many days
+    def start_stream(self, days=None, num_trades=None):
+        super().start_stream(days, num_trades)
+        purchase_ids = np.arange(self.duration if days is None else min(self.duration, days))
+        self.order_amount = self.to_spend / len(purchase_ids[purchase_ids % self.interval == 0])
+
+    def purchase_on_bar(self, bar):
+        if self.bars_seen < self.duration and self.bars_seen % self.interval == 0:
+            self.buy_in_dollars(self.order_amount, bar[self.time])
+
     # method that will clear the results from a strategy for a new trial
     def clear(self):
         super().clear()
-        self.purchase_df = None
+        self.purchase_prices = None
         self.order_amount = None
@@ -0,0 +1,100 @@
+from optimalStrategy import OptimalStrategyFinder
+from strategy import TimeStrategy
+from DatePercentStrategy import DatePercentStrategyLimitedFunds
+from trialPlan import test_strategies_on_plan
+from trialRunner import test_strategies, test_time_strategies_exhaustive
+from walkForward import walk_forward
+
+
+# method that will make a time strategy for every interval from daily to one trade per year
+def make_time_strategies(trial_days, capital, time):
+    strategies = []
+    for i in range(253):
+        strat_name = "every " + str(i+1) + " days"
+        strat = TimeStrategy(strat_name, i+1, trial_days, capital, time)
+        strategies.append(strat)
+    return strategies
+
+
+# method that will determine the n best time strategies
+# if adaptive the intervals are raced with OptimalStrategyFinder.adaptive_search using at most trials trials per interval
+# from the given seed rather than testing every interval on all of the trials
+# if a TrialPlan is given the strategies are tested on the trials of the plan (with results reused from the cache)
+# if exhaustive the strategies are tested on every possible start date and trials is ignored
+# the shares are valued at share_price, the latest close if it is None
+def get_best_time_strategies(sp_df, trial_days, capital, time, trials, adaptive=False, seed=0, plan=None,
+                             cache=None, exhaustive=False, top_n=10, share_price=None):
+    # create an instance of the OptimalStrategyFinder class that will hold
+    # the top_n best time interval strategies
+    optimal_finder = OptimalStrategyFinder(top_n)
+    strategies = make_time_strategies(trial_days, capital, time)
+
+    if adaptive:
+        optimal_finder.adaptive_search(strategies, sp_df, trial_days, trials, seed, share_price=share_price, plan=plan)
+        return optimal_finder
+
+    # obtain the results of all of these strategies
+    if exhaustive:
+        all_accum = test_time_strategies_exhaustive(strategies, sp_df, trial_days, False, share_price)
+    elif plan is not None:
+        all_accum = test_strategies_on_plan(strategies, sp_df, plan, False, share_price, cache)
+    else:
+        all_accum = test_strategies(strategies, sp_df, trial_days, trials, False, share_price)
+    # use optimal_finder to obtain the 5 best time interval strategies
+    for accum in all_accum:
+        optimal_finder.add_or_discard(accum)
+
+    return optimal_finder
+
+
+# method that will run a walk forward optimization of the time strategies, each fold picks the top_n intervals on a
+# training window of train_days days of the history and reports how they did on the next test_days days
+# see walk_forward in walkForward.py for the folds and the valuation
+def walk_forward_time_strategies(sp_df, trial_days, capital, time, train_days, test_days, top_n=10, step=None,
+                                 anchored=False, valuation="latest"):
+    return walk_forward(make_time_strategies(trial_days, capital, time), sp_df, trial_days, train_days, test_days,
+                        top_n, step, anchored, valuation)
+
+
+# method that will make the strategies for every combination of interval and purchase time together with a
+# limited funds percent strategy for every percentage down
+def make_strategy_grid(intervals, times, percents_down, trial_days, capital):
+    strategies = []
+    for time in times:
+        for interval in intervals:
+            strategies.append(TimeStrategy("every " + str(interval) + " days at " + time, interval, trial_days, capital,
+                                           time))
+    for percent_down in percents_down:
+        strategies.append(DatePercentStrategyLimitedFunds(str(percent_down) + "% down limited", percent_down,
+                                                          trial_days, capital))
+    return strategies
+
+
+# method that will determine the n best strategies over a grid of intervals, purchase times and percentages down
+# by racing them rather than testing every combination on all of the trials
+def get_best_strategies_adaptive(sp_df, trial_days, capital, trials, seed, intervals=range(1, 254),
+                                 times=("Open", "Close"), percents_down=(), top_n=10):
+    optimal_finder = OptimalStrategyFinder(top_n)
+    strategies = make_strategy_grid(intervals, times, percents_down, trial_days, capital)
+    optimal_finder.adaptive_search(strategies, sp_df, trial_days, trials, seed)
+    return optimal_finder
+
+
+# method that will determine the n best limited funds percent strategies over a grid of percentages down, amounts to
+# spend and durations, all of the combinations are evaluated together by execute_limited_funds_grid
+def get_best_limited_funds_strategies(sp_df, trial_days, percents_down, capitals, trials, durations=None, top_n=10):
+    optimal_finder = OptimalStrategyFinder(top_n)
+    if durations is None:
+        durations = [trial_days]
+
+    strategies = []
+    for percent_down in percents_down:
+        for capital in capitals:
+            for duration in durations:
+                strat_name = str(percent_down) + "% down limited $" + str(capital) + " over " + str(duration) + " days"
+                strategies.append(DatePercentStrategyLimitedFunds(strat_name, percent_down, duration, capital))
+
+    for accum in test_strategies(strategies, sp_df, trial_days, trials, False):
+        optimal_finder.add_or_discard(accum)
+
+    return optimal_finder
@@ -0,0 +1,201 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from batchEngine import RESULT_FIELDS, execute_time_strategies, execute_limited_funds_grid
+
+
+# class that will describe a strategy by its parameters alone
+# a spec is immutable, hashable and much smaller than a strategy or its accumulated results, so specs are what is
+# kept when ranking many candidates, they are serialized with to_dict and turned back into a strategy with
+# make_strategy, subclasses list their parameters in fields in the order of the strategy's constructor
+class StrategySpec(ABC):
+    __slots__ = ()
+    # the name of the strategy class that the spec describes
+    kind = None
+    fields = ()
+
+    def __init__(self, *values):
+        if len(values) != len(self.fields):
+            raise TypeError(type(self).__name__ + " takes " + ", ".join(self.fields))
+        for name, value in zip(self.fields, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(type(self).__name__ + " is immutable")
+
+    # pickle by the values since the slots cannot be set after the spec is made
+    def __reduce__(self):
+        return type(self), self.values()
+
+    # method that will return the values of the parameters in the order of fields
+    def values(self):
+        return tuple(getattr(self, name) for name in self.fields)
+
+    # method that will return a tuple of the class of the strategy and its parameters, this is the same tuple as
+    # Strategy.params so it is used as the key of the evaluation and result caches
+    def key(self):
+        return (self.kind,) + self.values()
+
+    def __eq__(self, other):
+        return isinstance(other, StrategySpec) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return type(self).__name__ + repr(self.values())
+
+    # method that will return a copy of the spec with some of the parameters replaced
+    def replace(self, **changes):
+        return type(self)(*[changes.pop(name, value) for name, value in zip(self.fields, self.values())])
+
+    # method that will return the spec as a dict that can be written as json
+    def to_dict(self):
+        spec_dict = {"kind": self.kind}
+        spec_dict.update(zip(self.fields, self.values()))
+        return spec_dict
+
+    # method that will return the name that a strategy made from the spec is given by default
+    def default_name(self):
+        return repr(self)
+
+    # method that will make the strategy that the spec describes
+    @abstractmethod
+    def make_strategy(self, name=None):
+        pass
+
+    # method that will return the key of the group that the spec is compiled with, the first item of the key is the
+    # function that makes the kernel of the group and specs with the same key are executed by a single kernel call
+    @abstractmethod
+    def kernel_group(self):
+        pass
+
+
+# spec of a TimeStrategy
+class TimeSpec(StrategySpec):
+    __slots__ = ("interval", "duration", "to_spend", "time")
+    kind = "TimeStrategy"
+    fields = __slots__
+
+    def default_name(self):
+        return "every " + str(self.interval) + " days"
+
+    def make_strategy(self, name=None):
+        from strategy import TimeStrategy
+        return TimeStrategy(name if name is not None else self.default_name(), self.interval, self.duration,
+                            self.to_spend, self.time)
+
+    def kernel_group(self):
+        if float(self.interval).is_integer():
+            return time_kernel, self.time, self.duration, self.to_spend
+        return (loop_kernel,)
+
+
+# spec of a DatePercentStrategyLimitedFunds
+class LimitedFundsSpec(StrategySpec):
+    __slots__ = ("percent_down", "duration", "to_spend")
+    kind = "DatePercentStrategyLimitedFunds"
+    fields = __slots__
+
+    def default_name(self):
+        return str(self.percent_down) + "% down limited"
+
+    def make_strategy(self, name=None):
+        from DatePercentStrategy import DatePercentStrategyLimitedFunds
+        return DatePercentStrategyLimitedFunds(name if name is not None else self.default_name(), self.percent_down,
+                                               self.duration, self.to_spend)
+
+    def kernel_group(self):
+        return (limited_funds_kernel,)
+
+
+# spec of a DatePercentStrategyConstTrade
+class ConstTradeSpec(StrategySpec):
+    __slots__ = ("percent_down", "duration", "order_amount")
+    kind = "DatePercentStrategyConstTrade"
+    fields = __slots__
+
+    def default_name(self):
+        return str(self.percent_down) + "% down const trade"
+
+    def make_strategy(self, name=None):
+        from DatePercentStrategy import DatePercentStrategyConstTrade
+        return DatePercentStrategyConstTrade(name if name is not None else self.default_name(), self.percent_down,
+                                             self.duration, self.order_amount)
+
+    # there is no array kernel for a constant trade strategy
+    def kernel_group(self):
+        return (loop_kernel,)
+
+
+# dict from the kind of a spec to the class of the spec
+SPEC_TYPES = {spec_type.kind: spec_type for spec_type in (TimeSpec, LimitedFundsSpec, ConstTradeSpec)}
+
+
+# method that will make a spec from a dict written by StrategySpec.to_dict
+def spec_from_dict(spec_dict):
+    spec_type = SPEC_TYPES[spec_dict["kind"]]
+    return spec_type(*[spec_dict[name] for name in spec_type.fields])
+
+
+# method that will make a kernel that executes time specs that share a column, duration and amount to spend with a
+# single call to execute_time_strategies
+def time_kernel(specs):
+    intervals = [int(spec.interval) for spec in specs]
+
+    def kernel(sp_hist, days, starts, share_price):
+        # a strategy only buys on the days of the window, as generate_purchase_ids stops at the window's length
+        return execute_time_strategies(sp_hist[specs[0].time], starts, intervals, min(specs[0].duration, days),
+                                       specs[0].to_spend, share_price)
+    return kernel
+
+
+# method that will make a kernel that executes limited funds specs with a single call to execute_limited_funds_grid
+def limited_funds_kernel(specs):
+    percents_down = [spec.percent_down for spec in specs]
+    totals_to_spend = [spec.to_spend for spec in specs]
+    durations = [spec.duration for spec in specs]
+
+    def kernel(sp_hist, days, starts, share_price):
+        return execute_limited_funds_grid(sp_hist["Open"], sp_hist.percent_index, percents_down, totals_to_spend,
+                                          durations, starts, days, share_price)
+    return kernel
+
+
+# method that will make a kernel that executes specs that have no array kernel by executing their strategies on each
+# trial window in turn
+def loop_kernel(specs):
+    strategies = [spec.make_strategy() for spec in specs]
+
+    def kernel(sp_hist, days, starts, share_price):
+        results = np.empty((len(starts), len(strategies), len(RESULT_FIELDS)))
+        for i, start in enumerate(starts):
+            test_df = sp_hist.window(start, days)
+            for j, strategy in enumerate(strategies):
+                strategy.execute_strategy(test_df)
+                strategy.update_share_price(share_price)
+                results[i, j] = strategy.results_copy()
+                strategy.clear()
+        return results
+    return kernel
+
+
+# method that will compile specs into kernels, the specs are grouped by type (and for time specs by column, duration
+# and amount to spend) so that each group is a single vectorized call
+# returns a list of (kernel, positions) pairs where positions are the positions in specs of the specs of the kernel
+# and kernel(sp_hist, days, starts, share_price) returns an array of shape (len(starts), len(positions), 5)
+def compile_specs(specs):
+    groups = {}
+    for j, spec in enumerate(specs):
+        groups.setdefault(spec.kernel_group(), []).append(j)
+    return [(group[0]([specs[j] for j in positions]), positions) for group, positions in groups.items()]
+
+
+# method that will execute the specs on the trials beginning at each of the starts
+# returns an array of shape (len(starts), len(specs), 5) identical to executing the strategies the specs describe
+def execute_specs(specs, sp_hist, days, starts, share_price, compiled=None):
+    if compiled is None:
+        compiled = compile_specs(specs)
+    results = np.empty((len(starts), len(specs), len(RESULT_FIELDS)))
+    for kernel, positions in compiled:
+        results[:, positions] = kernel(sp_hist, days, starts, share_price)
+    return results
@@ -0,0 +1,51 @@
+import sqlite3
+import numpy as np
+
+# the number of trading days in a year, used to scale the annual drift and volatility to a day
+TRADING_DAYS = 252
+# the number of days after which a generated history starts again from the start price, the drift compounds without
+# bound so otherwise the closes of a history of millions of days overflow to inf
+RESET_DAYS = 100 * TRADING_DAYS
+
+
+# method that will generate a daily open, high, low and close price history of the given number of days
+# the closes follow a geometric brownian motion, each open gaps from the previous close and the high and low extend
+# past the open and close by a random intraday range so that Low / Open behaves like the VOO history
+# the walk is kept in log space and begins again from the start price every RESET_DAYS days, the open of the first day
+# after a reset gaps from the start price (like the open after a split) so every day's prices stay consistent, and
+# histories of up to RESET_DAYS days are not affected
+# returns a dict from the column name to an array in the same form as load_columns
+def generate_gbm_prices(num_days, seed=0, start_price=100.0, drift=0.07, volatility=0.18, gap_volatility=0.003,
+                        intraday_volatility=0.008, start_date="1990-01-01"):
+    rng = np.random.default_rng(seed)
+    daily_drift = (drift - volatility ** 2 / 2) / TRADING_DAYS
+    daily_volatility = volatility / np.sqrt(TRADING_DAYS)
+
+    log_returns = daily_drift + daily_volatility * rng.standard_normal(num_days)
+    log_close = np.empty(num_days)
+    for first in range(0, num_days, RESET_DAYS):
+        np.cumsum(log_returns[first:first + RESET_DAYS], out=log_close[first:first + RESET_DAYS])
+    close = start_price * np.exp(log_close)
+    previous_close = np.concatenate(([start_price], close[:-1]))
+    previous_close[::RESET_DAYS] = start_price
+    open_prices = previous_close * np.exp(gap_volatility * rng.standard_normal(num_days))
+    high = np.maximum(open_prices, close) * np.exp(intraday_volatility * np.abs(rng.standard_normal(num_days)))
+    low = np.minimum(open_prices, close) * np.exp(-intraday_volatility * np.abs(rng.standard_normal(num_days)))
+
+    # the dates are consecutive business days
+    dates = np.busday_offset(np.datetime64(start_date, "D"), np.arange(num_days), roll="forward")
+
+    return {"Date": dates, "Open": open_prices, "High": high, "Low": low, "Close": close}
+
+
+# method that will write a generated price history to a table in the same form as the sp table made by make_sp_sqlite
+def write_sqlite(columns, db_path, table="sp"):
+    con = sqlite3.connect(db_path)
+    cur = con.cursor()
+    cur.execute('DROP TABLE IF EXISTS ' + table)
+    cur.execute('CREATE TABLE ' + table + ' (date text, open real, high real, low real, close real)')
+    records = zip(np.datetime_as_string(columns["Date"], unit="D").tolist(), columns["Open"].tolist(),
+                  columns["High"].tolist(), columns["Low"].tolist(), columns["Close"].tolist())
+    cur.executemany('INSERT INTO ' + table + ' VALUES(?,?,?,?,?);', records)
+    con.commit()
+    con.close()
@@ -0,0 +1,77 @@
+import numpy as np
+from batchEngine import execute_limited_funds_grid, execute_time_strategies
+from DatePercentStrategy import DatePercentStrategyLimitedFunds
+from priceWindow import PriceHistory
+from strategy import TimeStrategy
+from syntheticPrices import generate_gbm_prices
+from trialRunner import execute_time_strategies_exhaustive, execute_trials
+
+TRIAL_DAYS = 254
+TO_SPEND = 100000
+
+
+# method that will return a fixed synthetic history and the trial starts drawn from it
+def make_trials(length=3000, num_trials=40, seed=7):
+    sp_hist = PriceHistory.from_columns(generate_gbm_prices(length, seed))
+    starts = np.random.default_rng(seed).integers(1, length - TRIAL_DAYS + 1, num_trials)
+    return sp_hist, starts
+
+
+# method that will execute each strategy on each trial window one at a time as the trial runners did before the
+# batch engine and return the results in the same layout as the engine
+def execute_one_at_a_time(strategies, sp_hist, starts, share_price):
+    results = np.empty((len(starts), len(strategies), 5))
+    for i, start in enumerate(starts):
+        for j, strategy in enumerate(strategies):
+            strategy.execute_strategy(sp_hist.window(start, TRIAL_DAYS))
+            strategy.update_share_price(share_price)
+            results[i, j] = strategy.results_copy()
+            strategy.clear()
+    return results
+
+
+def test_time_strategies_match_time_strategy():
+    sp_hist, starts = make_trials()
+    share_price = sp_hist.latest_close()
+    intervals = [1, 2, 7, 30, 130, 253, 254, 400]
+    for time in ("Open", "Close"):
+        strategies = [TimeStrategy("every " + str(interval) + " days", interval, TRIAL_DAYS, TO_SPEND, time)
+                      for interval in intervals]
+        expected = execute_one_at_a_time(strategies, sp_hist, starts, share_price)
+        results = execute_time_strategies(sp_hist[time], starts, intervals, TRIAL_DAYS, TO_SPEND, share_price)
+        # the engine is exact, not merely close
+        assert np.array_equal(results, expected)
+
+
+def test_time_strategies_longer_than_the_trial():
+    sp_hist, starts = make_trials()
+    # the last start that a trial can begin on leaves no rows after the window
+    starts = np.append(starts, len(sp_hist) - TRIAL_DAYS)
+    share_price = sp_hist.latest_close()
+    strategies = [TimeStrategy("every " + str(interval) + " days over " + str(duration), interval, duration, TO_SPEND,
+                               "Open") for interval in (1, 7, 130) for duration in (30, TRIAL_DAYS, 300)]
+    expected = execute_one_at_a_time(strategies, sp_hist, starts, share_price)
+    assert np.array_equal(execute_trials(strategies, sp_hist, TRIAL_DAYS, starts, share_price), expected)
+
+    # the exhaustive runner sums by prefix sums so it only agrees to within rounding
+    all_starts, results = execute_time_strategies_exhaustive(strategies, sp_hist, TRIAL_DAYS, share_price)
+    expected = execute_one_at_a_time(strategies, sp_hist, all_starts[::97], share_price)
+    assert np.array_equal(results[::97, :, 0], expected[:, :, 0])
+    assert np.allclose(results[::97], expected, rtol=1e-9, atol=0)
+
+
+def test_limited_funds_grid_matches_limited_funds_strategy():
+    sp_hist, starts = make_trials()
+    share_price = sp_hist.latest_close()
+    # every combination of percentage down, amount to spend and duration including a duration past the trial's end
+    # and a percentage down that no day of the history reaches so there are no trades
+    grid = [(percent_down, to_spend, duration) for percent_down in (0.5, 0.9, 1, 1.5, 3, 10)
+            for to_spend in (1000, TO_SPEND) for duration in (30, TRIAL_DAYS, 400)]
+    strategies = [DatePercentStrategyLimitedFunds(str(percent_down) + "% down limited", percent_down, duration,
+                                                  to_spend) for percent_down, to_spend, duration in grid]
+    expected = execute_one_at_a_time(strategies, sp_hist, starts, share_price)
+    percents_down, totals_to_spend, durations = zip(*grid)
+    results = execute_limited_funds_grid(sp_hist["Open"], sp_hist.percent_index, percents_down, totals_to_spend,
+                                         durations, starts, TRIAL_DAYS, share_price)
+    assert np.array_equal(results, expected)
+    assert not results[:, -6:, 0].any()
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from minuteBars import MINUTE_COLUMNS, MINUTES_PER_DAY, DailyAggregator, MinuteBarStore, generate_minute_bars, \
+    iter_daily_bars, stream_strategies
+from DatePercentStrategy import DatePercentStrategyLimitedFunds
+from strategy import TimeStrategy
+
+DAILY_COLUMNS = ("Date", "Open", "High", "Low", "Close")
+
+
+# method that will return the minute bars of num_days days as a single chunk
+def all_bars(num_days, seed=0):
+    chunks = list(generate_minute_bars(num_days, seed, days_per_chunk=num_days))
+    return chunks[0]
+
+
+# method that will split bars into chunks at the given positions
+def split(bars, positions):
+    bounds = [0] + list(positions) + [len(bars["Time"])]
+    return [{name: column[begin:end] for name, column in bars.items()} for begin, end in zip(bounds[:-1], bounds[1:])]
+
+
+# method that will aggregate the minute bars of each day directly
+def expected_daily(bars):
+    days = bars["Time"].astype("datetime64[D]").reshape(-1, MINUTES_PER_DAY)
+    return {"Date": days[:, 0],
+            "Open": bars["Open"].reshape(-1, MINUTES_PER_DAY)[:, 0],
+            "High": bars["High"].reshape(-1, MINUTES_PER_DAY).max(axis=1),
+            "Low": bars["Low"].reshape(-1, MINUTES_PER_DAY).min(axis=1),
+            "Close": bars["Close"].reshape(-1, MINUTES_PER_DAY)[:, -1]}
+
+
+# method that will join chunks of daily bars
+def concatenate(daily_chunks):
+    return {name: np.concatenate([chunk[name] for chunk in daily_chunks]) for name in DAILY_COLUMNS}
+
+
+def test_daily_bars_do_not_depend_on_where_the_chunks_split():
+    bars = all_bars(6)
+    expected = expected_daily(bars)
+    # splits in the middle of a day, on a day boundary, a single minute chunk and a chunk spanning several days
+    for positions in ([], [100], [MINUTES_PER_DAY], [1, 2, 3], [MINUTES_PER_DAY - 1, MINUTES_PER_DAY + 1],
+                      [50, 3 * MINUTES_PER_DAY + 7, 3 * MINUTES_PER_DAY + 8]):
+        daily = concatenate(list(iter_daily_bars(split(bars, positions))))
+        for name in DAILY_COLUMNS:
+            assert np.array_equal(daily[name], expected[name])
+
+
+def test_aggregator_holds_the_last_day_until_it_finishes():
+    bars = all_bars(2)
+    aggregator = DailyAggregator()
+    first, second = split(bars, [MINUTES_PER_DAY + 10])
+    assert len(aggregator.add(first)["Date"]) == 1
+    assert len(aggregator.add(second)["Date"]) == 0
+    last = aggregator.finish()
+    assert last["Close"][0] == bars["Close"][-1]
+    assert last["Open"][0] == bars["Open"][MINUTES_PER_DAY]
+    assert len(aggregator.finish()["Date"]) == 0
+
+
+def test_store_appends_and_reads_back_any_span(tmp_path):
+    store = MinuteBarStore(str(tmp_path))
+    # 50 business days from the start of 1990 span three months, appended in chunks that split months and days
+    chunks = list(generate_minute_bars(50, seed=1, days_per_chunk=7))
+    for chunk in chunks:
+        store.append("SPY", chunk)
+    bars = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in MINUTE_COLUMNS}
+
+    assert store.tickers() == ["SPY"]
+    assert [str(month) for month in store.partitions("SPY")] == ["1990-01", "1990-02", "1990-03"]
+    read = [chunk for chunk in store.iter_chunks("SPY")]
+    assert len(read) == 3
+    for name in MINUTE_COLUMNS:
+        assert np.array_equal(np.concatenate([chunk[name] for chunk in read]), bars[name])
+
+    # a span that starts and ends inside partitions
+    first, last = np.datetime64("1990-01-15T12:00"), np.datetime64("1990-02-20T10:00")
+    keep = (bars["Time"] >= first) & (bars["Time"] <= last)
+    span = [chunk for chunk in store.iter_chunks("SPY", first, last)]
+    for name in MINUTE_COLUMNS:
+        assert np.array_equal(np.concatenate([chunk[name] for chunk in span]), bars[name][keep])
+
+    daily = store.load_daily_columns("SPY")
+    assert len(daily["Date"]) == 50
+
+    with pytest.raises(ValueError):
+        store.append("SPY", chunks[0])
+
+
+def test_streaming_minute_bars_matches_streaming_daily_bars():
+    bars = all_bars(300, seed=2)
+    daily = expected_daily(bars)
+    strategies = [TimeStrategy("every 7 days", 7, 254, 100000, "Open"),
+                  DatePercentStrategyLimitedFunds("0.5% down limited", 0.5, 254, 100000)]
+    expected = [TimeStrategy("every 7 days", 7, 254, 100000, "Open"),
+                DatePercentStrategyLimitedFunds("0.5% down limited", 0.5, 254, 100000)]
+    for strategy, expected_strategy in zip(strategies, expected):
+        strategy.start_stream(days=300, num_trades=40)
+        expected_strategy.start_stream(days=300, num_trades=40)
+        expected_strategy.update_many(daily)
+
+    stream_strategies(strategies, split(bars, [1000, 25000, 25001, 90000]))
+    for strategy, expected_strategy in zip(strategies, expected):
+        assert strategy.bars_seen == 300
+        assert strategy.results_copy() == expected_strategy.results_copy()
+        assert strategy.total_orders > 0
@@ -0,0 +1,24 @@
+from DatePercentStrategy import DatePercentStrategyLimitedFunds, DatePercentStrategyConstTrade
+from priceWindow import PriceHistory
+from strategy import TimeStrategy
+from syntheticPrices import generate_gbm_prices
+# renamed so that pytest does not collect it as a test
+from trialRunner import test_strategies_parallel as run_parallel
+
+TRIAL_DAYS = 254
+
+
+def test_results_do_not_depend_on_the_number_of_workers():
+    sp_hist = PriceHistory.from_columns(generate_gbm_prices(3000, seed=3))
+    strategies = [TimeStrategy("every 7 days", 7, TRIAL_DAYS, 100000, "Open"),
+                  TimeStrategy("every 130 days", 130, TRIAL_DAYS, 100000, "Close"),
+                  DatePercentStrategyLimitedFunds("1% down limited", 1, TRIAL_DAYS, 100000),
+                  DatePercentStrategyConstTrade("0.9% down const trade", 0.9, TRIAL_DAYS, 500)]
+    # small chunks so that every worker runs several of them
+    serial = run_parallel(strategies, sp_hist, TRIAL_DAYS, 500, False, seed=11, workers=1, chunk_size=37)
+    for workers in (2, 3):
+        parallel = run_parallel(strategies, sp_hist, TRIAL_DAYS, 500, False, seed=11, workers=workers, chunk_size=37)
+        for serial_accum, parallel_accum in zip(serial, parallel):
+            assert parallel_accum.summary() == serial_accum.summary()
+            assert parallel_accum.return_m2 == serial_accum.return_m2
+            assert parallel_accum.results_accumulated == 500
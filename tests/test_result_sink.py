@@ -0,0 +1,49 @@
+import random
+import numpy as np
+import pytest
+import trialRunner
+from batchEngine import RESULT_FIELDS
+from DatePercentStrategy import DatePercentStrategyConstTrade
+from priceWindow import PriceHistory
+from resultSink import ResultReader, ResultSink
+from strategy import TimeStrategy
+from syntheticPrices import generate_gbm_prices
+
+TRIAL_DAYS = 254
+
+
+def test_reader_returns_what_the_trials_accumulated(tmp_path, monkeypatch):
+    # small chunks so that the study is written as several chunks, the last one partial
+    monkeypatch.setattr(trialRunner, "SINK_CHUNK_SIZE", 16)
+    sp_hist = PriceHistory.from_columns(generate_gbm_prices(2000, seed=2))
+    strategies = [TimeStrategy("every " + str(interval) + " days", interval, TRIAL_DAYS, 100000, "Open")
+                  for interval in (1, 7, 130)] + [DatePercentStrategyConstTrade("1% down", 1, TRIAL_DAYS, 500)]
+    random.seed(4)
+    with ResultSink(str(tmp_path)) as sink:
+        accumulated = trialRunner.test_strategies(strategies, sp_hist, TRIAL_DAYS, 50, False, sink=sink)
+
+    reader = ResultReader(str(tmp_path))
+    assert reader.manifest["chunks"] == [16, 16, 16, 2]
+    # aggregate sums a chunk at a time rather than trial by trial, so the sums agree to within rounding
+    for accum, read_accum in zip(accumulated, reader.aggregate()):
+        summary = accum.summary()
+        for name, value in read_accum.summary().items():
+            if isinstance(value, float):
+                assert value == pytest.approx(summary[name], rel=1e-12, abs=1e-12)
+            else:
+                assert value == summary[name]
+
+    # a selection of one strategy is the same as that strategy's column of the whole selection
+    everything = reader.select()
+    selected = reader.select(["every 7 days"])
+    assert np.array_equal(selected[:, 0], everything[:, 1])
+    for k, field in enumerate(RESULT_FIELDS):
+        assert np.array_equal(reader.column(field, "every 7 days"), everything[:, 1, k])
+
+    # the values of a strategy are a contiguous block within each chunk of a field file
+    raw = np.fromfile(str(tmp_path / "percentage_return.bin"))
+    assert np.array_equal(raw[16:32], everything[:16, 1, 4])
+
+    starts = reader.starts()
+    middle = reader.select(first_start=int(np.median(starts)))
+    assert len(middle) == int(np.sum(starts >= int(np.median(starts))))
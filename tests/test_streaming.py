@@ -0,0 +1,47 @@
+import numpy as np
+from DatePercentStrategy import DatePercentStrategyLimitedFunds, DatePercentStrategyConstTrade
+from priceWindow import PriceHistory
+from strategy import TimeStrategy
+from syntheticPrices import generate_gbm_prices
+
+TRIAL_DAYS = 254
+
+
+# method that will make one strategy of each kind
+def make_strategies():
+    return [TimeStrategy("every 7 days", 7, TRIAL_DAYS, 100000, "Open"),
+            TimeStrategy("every 30 days over 300", 30, 300, 100000, "Close"),
+            DatePercentStrategyLimitedFunds("1% down limited", 1, TRIAL_DAYS, 100000),
+            DatePercentStrategyLimitedFunds("10% down limited", 10, TRIAL_DAYS, 100000),
+            DatePercentStrategyConstTrade("0.9% down const trade", 0.9, 200, 500)]
+
+
+def test_every_strategy_starts_without_arguments():
+    for strategy in make_strategies():
+        strategy.start_stream()
+        strategy.update({"Open": 100.0, "High": 101.0, "Low": 98.0, "Close": 99.0})
+        assert strategy.bars_seen == 1
+
+
+def test_streaming_with_checkpoints_matches_execute_strategy(tmp_path):
+    sp_hist = PriceHistory.from_columns(generate_gbm_prices(3000, seed=5))
+    for start in (1, 1200, len(sp_hist) - TRIAL_DAYS):
+        window = sp_hist.window(start, TRIAL_DAYS)
+        for expected, streamed, resumed in zip(make_strategies(), make_strategies(), make_strategies()):
+            expected.execute_strategy(window)
+            expected.update_share_price(window["Close"][-1])
+
+            # the limited funds strategies estimate their trades from the days after the start as execute_strategy does
+            num_trades = expected.num_trades if isinstance(expected, DatePercentStrategyLimitedFunds) else None
+            streamed.start_stream(days=TRIAL_DAYS, num_trades=num_trades)
+            streamed.update_many({name: window[name][:100] for name in ("Open", "High", "Low", "Close")})
+            # resume the rest of the trial in a new strategy from a checkpoint
+            path = str(tmp_path / "state.json")
+            streamed.save_state(path)
+            resumed.load_state(path)
+            resumed.update_many({name: window[name][100:] for name in ("Open", "High", "Low", "Close")})
+
+            assert resumed.results_copy() == expected.results_copy()
+            assert resumed.total_orders > 0 or expected.percent_down == 10
+            assert resumed.bars_seen == TRIAL_DAYS
+            assert np.isfinite(resumed.results_copy()).all()
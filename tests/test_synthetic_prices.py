@@ -0,0 +1,20 @@
+import numpy as np
+from syntheticPrices import RESET_DAYS, generate_gbm_prices
+
+# the longest history that the benchmarks generate, see the benchmark example in README.md
+LARGEST_DAYS = 5000000
+
+
+def test_largest_history_is_finite():
+    columns = generate_gbm_prices(LARGEST_DAYS)
+    for name in ("Open", "High", "Low", "Close"):
+        assert np.isfinite(columns[name]).all()
+        assert (columns[name] > 0).all()
+
+
+def test_reset_starts_again_from_start_price():
+    columns = generate_gbm_prices(2 * RESET_DAYS + 10, seed=1, start_price=100.0)
+    # the first open after each reset gaps from the start price as the first open of the history does
+    assert np.all(np.abs(np.log(columns["Open"][::RESET_DAYS] / 100.0)) < 0.05)
+    assert np.all(columns["Low"] <= np.minimum(columns["Open"], columns["Close"]))
+    assert np.all(columns["High"] >= np.maximum(columns["Open"], columns["Close"]))
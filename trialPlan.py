@@ -0,0 +1,129 @@
+import hashlib
+import json
+import numpy as np
+from batchEngine import RESULT_FIELDS
+from priceWindow import as_price_history
+from trialRunner import seeded_start, execute_trials, accumulate_trials, print_accum_results
+
+
+# class that will be a fixed set of trials that every strategy is evaluated against
+# using the same trials for every strategy and for both the search and the final comparison removes the variance of
+# comparing strategies on different random start dates (common random numbers)
+class TrialPlan:
+    def __init__(self, starts, days, history_length, seed=None):
+        # the row of the price history at which each trial begins
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.days = days
+        self.history_length = history_length
+        self.seed = seed
+
+    # method that will create a plan of num_trials seeded trials, trial i of the plan begins on the same row as
+    # trial i of a seeded run of test_strategies_parallel or OptimalStrategyFinder.adaptive_search with the same seed
+    @classmethod
+    def create(cls, sp_df, days, num_trials, seed):
+        sp_hist = as_price_history(sp_df)
+        starts = [seeded_start(sp_hist, days, seed, trial) for trial in range(num_trials)]
+        return cls(starts, days, len(sp_hist), seed)
+
+    def __len__(self):
+        return len(self.starts)
+
+    # method that will return a plan of the first num_trials trials of this plan
+    def head(self, num_trials):
+        return TrialPlan(self.starts[:num_trials], self.days, self.history_length, self.seed)
+
+    # method that will return a hash of the trials in the plan
+    def digest(self):
+        hasher = hashlib.sha256()
+        hasher.update(str((self.days, self.history_length)).encode())
+        hasher.update(self.starts.tobytes())
+        return hasher.hexdigest()
+
+    def to_dict(self):
+        return {"starts": self.starts.tolist(), "days": self.days, "history_length": self.history_length,
+                "seed": self.seed}
+
+    @classmethod
+    def from_dict(cls, plan_dict):
+        return cls(plan_dict["starts"], plan_dict["days"], plan_dict["history_length"], plan_dict["seed"])
+
+    # method that will write the plan to a json file
+    def save(self, path):
+        with open(path, "w") as plan_file:
+            json.dump(self.to_dict(), plan_file)
+
+    # method that will read a plan from a json file
+    @classmethod
+    def load(cls, path):
+        with open(path) as plan_file:
+            return cls.from_dict(json.load(plan_file))
+
+
+# class that will hold the results of every trial of a plan for strategies that have already been evaluated
+# the results are keyed by the strategy's params, the plan, the prices and the price the shares are valued at
+class EvaluationCache:
+    def __init__(self):
+        self.results = {}
+
+    # method that will return the key of a strategy's results or None if the strategy cannot be cached
+    @staticmethod
+    def key(strategy, sp_hist, plan, share_price):
+        params = strategy.params()
+        if params is None:
+            return None
+        return params, sp_hist.digest(), plan.digest(), share_price
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, results):
+        self.results[key] = results
+
+    def __len__(self):
+        return len(self.results)
+
+
+# method that will evaluate the strategies on every trial of the plan
+# returns an array of shape (len(plan), len(strategies), 5) laid out as Strategy.results_copy
+# the results of the strategies that are in the cache are reused and the rest are executed and added to the cache
+def evaluate_plan(strategies, sp_df, plan, share_price, cache=None):
+    sp_hist = as_price_history(sp_df)
+    if len(sp_hist) != plan.history_length:
+        raise ValueError("the trial plan was made for a price history of a different length")
+
+    results = np.empty((len(plan), len(strategies), len(RESULT_FIELDS)))
+    keys = [None] * len(strategies)
+    missing = []
+    for j, strategy in enumerate(strategies):
+        if cache is not None:
+            keys[j] = cache.key(strategy, sp_hist, plan, share_price)
+        cached = cache.get(keys[j]) if keys[j] is not None else None
+        if cached is None:
+            missing.append(j)
+        else:
+            results[:, j] = cached
+
+    if missing:
+        missing_results = execute_trials([strategies[j] for j in missing], sp_hist, plan.days, plan.starts,
+                                         share_price)
+        for k, j in enumerate(missing):
+            results[:, j] = missing_results[:, k]
+            if keys[j] is not None:
+                cache.put(keys[j], missing_results[:, k].copy())
+
+    return results
+
+
+# method that will test the strategies on the trials of the plan in the same manner as test_strategies
+# the shares are valued at share_price when a trial ends, which defaults to the latest close in the price history
+def test_strategies_on_plan(strategies, sp_df, plan, print, share_price=None, cache=None):
+    sp_hist = as_price_history(sp_df)
+    if share_price is None:
+        share_price = sp_hist.latest_close()
+
+    accumulated_results = accumulate_trials(strategies, evaluate_plan(strategies, sp_hist, plan, share_price, cache))
+
+    if print:
+        print_accum_results(accumulated_results)
+
+    return accumulated_results
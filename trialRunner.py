@@ -0,0 +1,241 @@
+import random
+from multiprocessing import Pool, shared_memory
+import numpy as np
+from strategy import TimeStrategy
+from resultAccumulator import ResultAccumulator
+from batchEngine import RESULT_FIELDS, all_starts, exhaustive_time_strategies
+from strategySpec import execute_specs
+from priceWindow import PriceHistory, PRICE_COLUMNS, as_price_history
+
+# the number of trials in a chunk of a seeded run, the results of a seeded run are accumulated per chunk and the
+# chunks are merged in order, so the chunk size (and not the number of workers) determines the accumulated results
+TRIAL_CHUNK_SIZE = 64
+# the number of trials that are executed and written at once when the results of every trial are written to a sink
+SINK_CHUNK_SIZE = 4096
+
+
+# method that will draw the random start of a trial, the trial starts on the row after the one drawn
+def draw_start(sp_df, days, rng=random):
+    rand_start = rng.randint(0, len(sp_df) - days - 1)
+    return rand_start + 1
+
+
+# method that will draw the start of a single trial of a seeded run
+# every trial has its own random generator so that the start does not depend on which process runs the trial
+def seeded_start(sp_df, days, seed, trial):
+    return draw_start(sp_df, days, random.Random("%d-%d" % (seed, trial)))
+
+
+# method that will make a test window starting on a random date that is exactly as many days as passed in as a
+# parameter, the window is a view of the price history indexed from 0 so no rows are copied
+def make_test_df(sp_df, days, start=None):
+    sp_hist = as_price_history(sp_df)
+    if start is None:
+        start = draw_start(sp_hist, days)
+
+    return sp_hist.window(start, days)
+
+
+# method that will determine if a strategy can be executed by the batch engine
+def is_batchable(strategy):
+    return isinstance(strategy, TimeStrategy) and float(strategy.interval).is_integer()
+
+
+# method that will execute the strategies on the trials beginning at each of the starts
+# returns an array of shape (len(starts), len(strategies), 5) holding the results_copy of every strategy for every trial
+def execute_trials(strategies, sp_hist, days, starts, share_price):
+    results = np.empty((len(starts), len(strategies), len(RESULT_FIELDS)))
+
+    # the strategies that have specs are compiled into kernels that evaluate each group for all trials at once
+    specs = [strategy.spec() for strategy in strategies]
+    compiled = [j for j in range(len(strategies)) if specs[j] is not None]
+    if compiled:
+        results[:, compiled] = execute_specs([specs[j] for j in compiled], sp_hist, days, starts, share_price)
+
+    # the rest of the strategies are executed trial by trial
+    looped = [j for j in range(len(strategies)) if specs[j] is None]
+    if looped:
+        for i, start in enumerate(starts):
+            test_df = sp_hist.window(start, days)
+            for j in looped:
+                strategy = strategies[j]
+                strategy.execute_strategy(test_df)
+                strategy.update_share_price(share_price)
+                # strategy.print_strategy_results()
+                results[i, j] = strategy.results_copy()
+                strategy.clear()
+
+    return results
+
+
+# method that will accumulate the results of every trial returned by execute_trials
+# if accumulated_results are given the results are accumulated onto them in order, so accumulating the trials a chunk
+# at a time gives the same results as accumulating all of the trials at once
+# returns a list with a result accumulator for each strategy
+def accumulate_trials(strategies, results, accumulated_results=None):
+    # create a list of result accumulators
+    if accumulated_results is None:
+        accumulated_results = [ResultAccumulator(strategy.name, strategy.spec()) for strategy in strategies]
+    for j, accum in enumerate(accumulated_results):
+        for trial_results in results[:, j].tolist():
+            accum.accum_results(trial_results)
+
+    return accumulated_results
+
+
+# method that will run the strategies on the trials beginning at each of the starts
+# returns a list with a result accumulator for each strategy
+def run_trials(strategies, sp_hist, days, starts, share_price):
+    return accumulate_trials(strategies, execute_trials(strategies, sp_hist, days, starts, share_price))
+
+
+# method that will take in the specified strategies and test them from random start dates
+# the shares are valued at share_price when a trial ends, which defaults to the latest close in the price history
+# if a ResultSink is given the results of every trial are written to it as the trials are run
+def test_strategies(strategies, sp_df, days, num_trials, print, share_price=None, sink=None):
+    # the trial windows are all views of the same price history
+    sp_hist = as_price_history(sp_df)
+    if share_price is None:
+        share_price = sp_hist.latest_close()
+    if sink is None:
+        # draw all of the trial starts up front so that the batched and the looped strategies see the same trials
+        starts = [draw_start(sp_hist, days) for i in range(num_trials)]
+        accumulated_results = run_trials(strategies, sp_hist, days, starts, share_price)
+    else:
+        # draw the starts and execute the trials a chunk at a time so that only a chunk of the starts and the results
+        # is held in memory, the starts are drawn in the same order so the trials are the same as without a sink
+        accumulated_results = None
+        for first in range(0, num_trials, SINK_CHUNK_SIZE):
+            chunk_starts = [draw_start(sp_hist, days) for i in range(first, min(first + SINK_CHUNK_SIZE, num_trials))]
+            results = execute_trials(strategies, sp_hist, days, chunk_starts, share_price)
+            sink.write(strategies, sp_hist, chunk_starts, results)
+            accumulated_results = accumulate_trials(strategies, results, accumulated_results)
+        if accumulated_results is None:
+            accumulated_results = accumulate_trials(strategies, np.empty((0, len(strategies), len(RESULT_FIELDS))))
+
+    if print:
+        print_accum_results(accumulated_results)
+
+    return accumulated_results
+
+
+# method that will execute the time strategies on every possible trial start of the price history rather than on random
+# starts, returns the starts and an array of shape (len(starts), len(strategies), 5) holding the whole distribution
+# of results_copy of every strategy
+def execute_time_strategies_exhaustive(strategies, sp_df, days, share_price=None):
+    sp_hist = as_price_history(sp_df)
+    if share_price is None:
+        share_price = sp_hist.latest_close()
+    starts = all_starts(len(sp_hist), days)
+
+    results = np.empty((len(starts), len(strategies), len(RESULT_FIELDS)))
+    groups = {}
+    for j, strategy in enumerate(strategies):
+        if not is_batchable(strategy):
+            raise ValueError(strategy.name + " is not a time strategy with a whole number interval")
+        groups.setdefault((strategy.time, strategy.duration, strategy.to_spend), []).append(j)
+    for (time, duration, to_spend), positions in groups.items():
+        intervals = [int(strategies[j].interval) for j in positions]
+        # the purchases stop at the end of the trial when the duration is longer than the trial
+        results[:, positions] = exhaustive_time_strategies(sp_hist[time], intervals, min(duration, days), to_spend,
+                                                           share_price, starts)
+
+    return starts, results
+
+
+# method that will test the time strategies on every possible trial start in the same manner as test_strategies
+# this gives the exact average over all start dates rather than an estimate from random start dates
+def test_time_strategies_exhaustive(strategies, sp_df, days, print, share_price=None):
+    starts, results = execute_time_strategies_exhaustive(strategies, sp_df, days, share_price)
+
+    accumulated_results = []
+    for j, strategy in enumerate(strategies):
+        accum = ResultAccumulator(strategy.name, strategy.spec())
+        accum.accum_results_array(results[:, j])
+        accumulated_results.append(accum)
+
+    if print:
+        print_accum_results(accumulated_results)
+
+    return accumulated_results
+
+
+# the state of a worker process in a parallel run, set once by init_worker
+worker_state = {}
+
+
+# method that will attach a worker process to the shared price arrays and hold the strategies to test
+def init_worker(shm_name, length, strategies, days, seed, share_price):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    prices = np.ndarray((len(PRICE_COLUMNS), length), dtype=np.float64, buffer=shm.buf)
+    worker_state["shm"] = shm
+    worker_state["sp_hist"] = PriceHistory(dict(zip(PRICE_COLUMNS, prices)))
+    worker_state["strategies"] = strategies
+    worker_state["days"] = days
+    worker_state["seed"] = seed
+    worker_state["share_price"] = share_price
+
+
+# method that will run a chunk of the trials of a seeded run and return the accumulated results for the chunk
+def run_trial_chunk(sp_hist, strategies, days, seed, share_price, first_trial, last_trial):
+    starts = [seeded_start(sp_hist, days, seed, trial) for trial in range(first_trial, last_trial)]
+    return run_trials(strategies, sp_hist, days, starts, share_price)
+
+
+# method that will run a chunk of trials in a worker process
+def run_worker_chunk(trial_range):
+    return run_trial_chunk(worker_state["sp_hist"], worker_state["strategies"], worker_state["days"],
+                           worker_state["seed"], worker_state["share_price"], trial_range[0], trial_range[1])
+
+
+# method that will test the strategies from seeded random start dates with the trials sharded across processes
+# the accumulated results are identical for any number of workers including a serial run with workers=1
+def test_strategies_parallel(strategies, sp_df, days, num_trials, print, seed, workers=None,
+                             chunk_size=TRIAL_CHUNK_SIZE, share_price=None):
+    sp_hist = as_price_history(sp_df)
+    if share_price is None:
+        share_price = sp_hist.latest_close()
+    chunks = [(first, min(first + chunk_size, num_trials)) for first in range(0, num_trials, chunk_size)]
+
+    accumulated_results = []
+    for strategy in strategies:
+        accumulated_results.append(ResultAccumulator(strategy.name, strategy.spec()))
+
+    if workers == 1:
+        for first, last in chunks:
+            chunk_accum = run_trial_chunk(sp_hist, strategies, days, seed, share_price, first, last)
+            for accum, chunk in zip(accumulated_results, chunk_accum):
+                accum.merge(chunk)
+    else:
+        # copy the prices into shared memory once so that the workers do not receive a pickled copy per task
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(PRICE_COLUMNS) * len(sp_hist) * 8))
+        prices = None
+        try:
+            prices = np.ndarray((len(PRICE_COLUMNS), len(sp_hist)), dtype=np.float64, buffer=shm.buf)
+            for i, name in enumerate(PRICE_COLUMNS):
+                prices[i] = sp_hist[name]
+            with Pool(workers, initializer=init_worker,
+                      initargs=(shm.name, len(sp_hist), strategies, days, seed, share_price)) as pool:
+                # imap returns the chunks in order so they are merged in the same order as a serial run
+                for chunk_accum in pool.imap(run_worker_chunk, chunks):
+                    for accum, chunk in zip(accumulated_results, chunk_accum):
+                        accum.merge(chunk)
+        finally:
+            # the view must be released before the buffer is closed, otherwise close raises a BufferError that would
+            # hide the exception of a failed worker
+            del prices
+            shm.close()
+            shm.unlink()
+
+    if print:
+        print_accum_results(accumulated_results)
+
+    return accumulated_results
+
+
+# method that will print the accumulated results
+def print_accum_results(accumulated_results):
+    print("\n---------------------------\n")
+    print("Testing complete!!!")
+    for accumulate_result in accumulated_results:
+        accumulate_result.print_strategy_results()
@@ -0,0 +1,134 @@
+import math
+import numpy as np
+from optimalStrategy import OptimalStrategyFinder
+from priceWindow import as_price_history
+from trialRunner import execute_time_strategies_exhaustive
+
+
+# class that will hold the prefix sums over consecutive trial starts of the results of every strategy so that the
+# totals of any window of starts are found with two lookups rather than by summing the trials again
+# results is an array of shape (starts, strategies, 5) as returned by execute_time_strategies_exhaustive
+class WindowAggregates:
+    def __init__(self, starts, results, names, specs):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.names = names
+        self.specs = specs
+        # prefix[i] is the sum of the results of the trials at the positions [0, i)
+        self.prefix = np.zeros((len(results) + 1,) + results.shape[1:])
+        np.cumsum(results, axis=0, out=self.prefix[1:])
+        # the prefix sums of the squared percentage return for the standard deviation
+        self.prefix_squares = np.zeros((len(results) + 1, results.shape[1]))
+        np.cumsum(results[:, :, 4] ** 2, axis=0, out=self.prefix_squares[1:])
+
+    # method that will return the positions [begin, end) of the trials whose starts are in [first_start, last_start]
+    def positions(self, first_start, last_start):
+        return (int(np.searchsorted(self.starts, first_start, side="left")),
+                int(np.searchsorted(self.starts, last_start, side="right")))
+
+    # method that will return the position of the strategy with a spec, or with the name of the summary if it has none
+    def position(self, spec, summary):
+        if spec is not None:
+            return self.specs.index(spec)
+        return self.names.index(summary["name"])
+
+    # method that will return the average return of every strategy over the trials at the positions [begin, end)
+    # computed as ResultAccumulator.get_avg_total does, the net return over the amount spent
+    def scores(self, begin, end):
+        totals = self.prefix[end] - self.prefix[begin]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return totals[:, 3] / totals[:, 1]
+
+    # method that will return the summary of a strategy's results over the trials at the positions [begin, end) in
+    # the same form as ResultAccumulator.summary, the percentiles and extremes cannot be found from prefix sums so
+    # they are None
+    def summary(self, k, begin, end):
+        count = end - begin
+        totals = (self.prefix[end, k] - self.prefix[begin, k]).tolist()
+        mean = totals[4] / count
+        squares = float(self.prefix_squares[end, k] - self.prefix_squares[begin, k])
+        std = math.sqrt(max(squares - count * mean * mean, 0.0) / (count - 1)) if count > 1 else 0.0
+        half_width = 1.96 * std / math.sqrt(count)
+        return {"name": self.names[k], "spec": self.specs[k].to_dict() if self.specs[k] is not None else None,
+                "trials": count, "average_trades": totals[0] / count, "average_spent": totals[1] / count,
+                "average_final_total": totals[2] / count, "average_net_return": totals[3] / count,
+                "return": totals[3] / totals[1], "return_std": std,
+                "return_ci_low": mean - half_width, "return_ci_high": mean + half_width,
+                "return_p5": None, "return_p50": None, "return_p95": None, "return_min": None, "return_max": None}
+
+
+# method that will return the folds of a walk forward over a history of length rows
+# each fold trains on the history rows [train_begin, test_begin) and tests on the rows [test_begin, test_end), the
+# trials of a fold are the trials of days rows that lie wholly within its training or testing rows so no test trial
+# shares a day with a training trial, the folds advance by step rows (test_days by default) and if anchored every
+# fold trains from the first row
+# returns a list of (train_begin, test_begin, test_end) tuples
+def make_folds(length, days, train_days, test_days, step=None, anchored=False):
+    if train_days < days or test_days < days:
+        raise ValueError("the training and testing windows must be at least as long as a trial")
+    if step is None:
+        step = test_days
+    # the first row of the history that a trial can start on, as in all_starts
+    first_row = 1
+    folds = []
+    train_begin = first_row
+    while train_begin + train_days + test_days <= length:
+        test_begin = train_begin + train_days
+        folds.append((first_row if anchored else train_begin, test_begin, test_begin + test_days))
+        train_begin += step
+    return folds
+
+
+# method that will run a walk forward optimization of time strategies
+# every strategy is evaluated once on every trial start with the exhaustive engine and the results are turned into
+# prefix sums, so each fold ranks all of the strategies from the sums of its training trials in O(strategies) time
+# with an OptimalStrategyFinder and then looks up the testing results of the top_n strategies, rather than running
+# the trials of every fold again, the trials of overlapping folds are shared
+# if valuation is "latest" the shares of every trial are valued at the latest close as in test_strategies, if it is
+# "window_end" they are valued at the close on the last day of the trial so no trial is valued with a later price
+# returns a list with a dict per fold of the training and testing rows and dates, the top_n strategies found on the
+# training trials best first and their summaries on the training and on the testing trials, and the rank of the best
+# training strategy among all of the strategies on the testing trials
+def walk_forward(strategies, sp_df, days, train_days, test_days, top_n=10, step=None, anchored=False,
+                 valuation="latest"):
+    sp_hist = as_price_history(sp_df)
+    if valuation == "latest":
+        share_price = sp_hist.latest_close()
+    elif valuation == "window_end":
+        share_price = sp_hist["Close"][np.arange(1, len(sp_hist) - days + 1) + days - 1]
+    else:
+        raise ValueError("valuation must be latest or window_end")
+
+    starts, results = execute_time_strategies_exhaustive(strategies, sp_hist, days, share_price)
+    aggregates = WindowAggregates(starts, results, [strategy.name for strategy in strategies],
+                                  [strategy.spec() for strategy in strategies])
+
+    folds = []
+    for train_begin, test_begin, test_end in make_folds(len(sp_hist), days, train_days, test_days, step, anchored):
+        train_positions = aggregates.positions(train_begin, test_begin - days)
+        test_positions = aggregates.positions(test_begin, test_end - days)
+
+        # rank every strategy by its training return, only the summaries of the top_n are made
+        optimal_finder = OptimalStrategyFinder(top_n)
+        train_scores = aggregates.scores(*train_positions)
+        for k, score in enumerate(train_scores.tolist()):
+            optimal_finder.add_or_discard_score(score, aggregates.specs[k],
+                                                lambda k=k: aggregates.summary(k, *train_positions))
+
+        best = [aggregates.position(spec, summary) for score, spec, summary in optimal_finder.get_strategies()]
+        test_scores = aggregates.scores(*test_positions)
+        fold = {"train_rows": (train_begin, test_begin), "test_rows": (test_begin, test_end),
+                "train_trials": train_positions[1] - train_positions[0],
+                "test_trials": test_positions[1] - test_positions[0],
+                "top": [{"train": aggregates.summary(k, *train_positions),
+                         "test": aggregates.summary(k, *test_positions)} for k in best],
+                # 1 if the best strategy in training is also the best in testing
+                "test_rank_of_best": int(np.sum(test_scores > test_scores[best[0]])) + 1,
+                "best_test_return": float(np.max(test_scores))}
+        if sp_hist.dates is not None:
+            dates = np.asarray(sp_hist.dates).astype("datetime64[D]")
+            fold["train_dates"] = (str(dates[train_begin]), str(dates[test_begin - 1]))
+            fold["test_dates"] = (str(dates[test_begin]), str(dates[test_end - 1]))
+        folds.append(fold)
+
+    return folds
+